@@ -1,4 +1,5 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import jenkins
 import os
@@ -8,13 +9,32 @@ import re
 import requests
 from requests.auth import HTTPBasicAuth
 import time
-import google.generativeai as genai
 import base64
 import json
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote, unquote
 import tempfile
 import subprocess
 import urllib3
+import math
+import statistics
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import sqlite3
+import threading
+import itertools
+import bisect
+import numpy as np
+import hashlib
+import gzip
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+try:
+    import orjson
+except ImportError:  # orjson is optional; Flask's stdlib encoder is used without it
+    orjson = None
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Load environment variables
@@ -28,26 +48,399 @@ CORS(app)
 JENKINS_URL = os.getenv('JENKINS_URL', 'http://localhost:8080')
 JENKINS_USERNAME = os.getenv('JENKINS_USERNAME', 'admin')
 JENKINS_PASSWORD = os.getenv('JENKINS_PASSWORD', 'admin')
-
-# Gemini AI configuration
+JENKINS_TIMEOUT = int(os.getenv('JENKINS_TIMEOUT', 10))                         # Seconds per python-jenkins call
+JENKINS_RECONNECT_INTERVAL = int(os.getenv('JENKINS_RECONNECT_INTERVAL', 30))   # Seconds between reconnect/health probes
+JENKINS_CIRCUIT_FAILURES = int(os.getenv('JENKINS_CIRCUIT_FAILURES', 5))        # Consecutive outage errors that open the circuit
+JENKINS_CIRCUIT_RESET_SECONDS = int(os.getenv('JENKINS_CIRCUIT_RESET_SECONDS', 30))
+JENKINS_SNAPSHOT_SIZE = 256                                                     # Last good read responses kept for fallback
+JENKINS_SNAPSHOT_EXCLUDE = ('get_build_console_output',)                        # Too large to keep around
+
+# Gemini AI configuration; the SDK is imported on the first AI request (see get_genai)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("✅ Gemini AI configured successfully")
-else:
+genai = None
+_genai_lock = threading.Lock()
+if not GEMINI_API_KEY:
     print("⚠️ GEMINI_API_KEY not found in environment variables")
 
-# Initialize Jenkins server
-try:
-    jenkins_server = jenkins.Jenkins(JENKINS_URL, username=JENKINS_USERNAME, password=JENKINS_PASSWORD)
-    info = jenkins_server.get_info()
-    print("Successfully connected to Jenkins")
-    print(f"[DEBUG] Jenkins info: {info}")
-except Exception as e:
-    print(f"[ERROR] Failed to connect to Jenkins: {e}")
-    import traceback
-    traceback.print_exc()
-    jenkins_server = None
+def get_genai():
+    """Import and configure google.generativeai on first use; it is slow to import"""
+    global genai
+    with _genai_lock:
+        if genai is None:
+            import google.generativeai as sdk
+            sdk.configure(api_key=GEMINI_API_KEY)
+            print("✅ Gemini AI configured successfully")
+            genai = sdk
+    return genai
+
+# Metrics settings
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_HELP = {
+    'jenkins_ui_request_duration_seconds': 'Time to serve a request, by Flask route',
+    'jenkins_ui_outbound_request_duration_seconds': 'Time spent in calls to Jenkins, GitHub and Gemini, by target and operation',
+    'jenkins_ui_cache_requests_total': 'Cache lookups by cache and result',
+    'jenkins_ui_cache_hit_ratio': 'Share of cache lookups that were hits since start',
+    'jenkins_ui_queue_depth': 'Jenkins build queue size at the last sample, by state',
+    'jenkins_ui_queue_items': 'Items waiting in the Jenkins build queue at the last sample, by label',
+    'jenkins_ui_executors': 'Executors on online nodes at the last sample, by state',
+    'jenkins_ui_circuit_state': 'Circuit breaker state per controller (0 closed, 1 half open, 2 open)',
+    'jenkins_ui_circuit_rejected_calls_total': 'Calls rejected by the circuit breaker since start, per controller',
+    'jenkins_ui_snapshot_entries': 'Jenkins responses kept as fallback snapshots'
+}
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+def _metric_labels(labels):
+    """{name="value",...} with Prometheus escaping; empty for no labels"""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+def _metric_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metrics:
+    """In-process counters and histograms, rendered in the Prometheus text format"""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counters = defaultdict(int)   # (name, labels) -> value
+        self.histograms = {}               # (name, labels) -> [count per bucket..., count above last bucket, sum]
+        self.lock = threading.Lock()
+    
+    def increment(self, name, amount=1, **labels):
+        with self.lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += amount
+    
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+    
+    def cache(self, cache, hit):
+        self.increment('jenkins_ui_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+    
+    def cache_hit_ratios(self):
+        lookups = defaultdict(lambda: [0, 0])   # cache -> [misses, hits]
+        with self.lock:
+            for (name, labels), value in self.counters.items():
+                if name == 'jenkins_ui_cache_requests_total':
+                    labels = dict(labels)
+                    lookups[labels['cache']][labels['result'] == 'hit'] += value
+        return {cache: hits / (hits + misses) for cache, (misses, hits) in lookups.items()}
+    
+    def render(self, gauges, scraped_counters=()):
+        """Exposition text for every counter and histogram plus the given (name, labels, value) gauges
+        
+        scraped_counters are (name, labels, value) totals kept elsewhere and read at scrape time.
+        """
+        with self.lock:
+            counters = [key + (value,) for key, value in sorted(self.counters.items())] + sorted(scraped_counters)
+            histograms = sorted((key, list(series)) for key, series in self.histograms.items())
+        lines = []
+        described = set()
+        
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+        
+        for name, labels, value in counters:
+            describe(name, 'counter')
+            lines.append(f"{name}{_metric_labels(labels)} {_metric_value(value)}")
+        for (name, labels), series in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_metric_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{name}_bucket{_metric_labels(labels + (('le', '+Inf'),))} {cumulative}")
+            lines.append(f"{name}_sum{_metric_labels(labels)} {series[-1]:.6f}")
+            lines.append(f"{name}_count{_metric_labels(labels)} {cumulative}")
+        for name, labels, value in sorted(gauges, key=lambda gauge: gauge[0]):
+            describe(name, 'gauge')
+            lines.append(f"{name}{_metric_labels(labels)} {_metric_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics(METRICS_LATENCY_BUCKETS)
+
+@contextmanager
+def outbound_call(target, operation, **labels):
+    """Time a call to an external service; the yielded dict's 'outcome' can be overridden"""
+    call = {'outcome': 'ok'}
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call['outcome'] = 'error'
+        raise
+    finally:
+        metrics.observe('jenkins_ui_outbound_request_duration_seconds', time.perf_counter() - started,
+                        target=target, operation=operation, outcome=call['outcome'], **labels)
+
+def _metric_path(path):
+    """Collapse job/node names and numbers in a Jenkins path so it makes a bounded metric label"""
+    path = re.sub(r'(job/[^/]+/?)+', 'job/*/', path.strip('/'))
+    path = re.sub(r'computer/[^/]+', 'computer/*', path)
+    path = re.sub(r'/\d+(?=/|$)', '/*', path)
+    return path.strip('/') or '/'
+
+class JenkinsUnavailable(jenkins.JenkinsException):
+    """Raised instead of calling Jenkins while the circuit breaker is open"""
+
+def _is_jenkins_outage(error):
+    """True for errors meaning Jenkins is down or overloaded, as opposed to a rejected request"""
+    while error is not None:
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              jenkins.TimeoutException, TimeoutError)):
+            return True
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code >= 500:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures; one trial call is let through after `reset_seconds`"""
+    
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.open_count = 0
+        self.rejected = 0
+        self.on_open = []
+        self.lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a call may go to Jenkins now"""
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.time() - self.opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                return True
+            self.rejected += 1
+            return False
+    
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                print("[INFO] Jenkins circuit closed")
+            self.state = 'closed'
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open':
+                # Trial call failed: stay open for another reset period
+                self.state = 'open'
+                self.opened_at = time.time()
+                return
+            if self.state != 'closed' or self.failures < self.threshold:
+                return
+            self.state = 'open'
+            self.opened_at = time.time()
+            self.open_count += 1
+        print(f"[ALERT] Jenkins circuit opened after {self.failures} consecutive failures")
+        for callback in self.on_open:
+            callback()
+    
+    def status(self):
+        with self.lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = max(0, round(self.reset_seconds - (time.time() - self.opened_at), 1))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'threshold': self.threshold,
+                'opened_at': self.opened_at,
+                'retry_in_seconds': retry_in,
+                'times_opened': self.open_count,
+                'rejected_calls': self.rejected
+            }
+
+class SnapshotCache:
+    """Last successful response per Jenkins read, served while the circuit is open"""
+    
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()   # key -> (saved_at, value), least recently used first
+        self.served = 0
+        self.lock = threading.Lock()
+    
+    def remember(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+    
+    def recall(self, key):
+        """Stored value for key, or None; flags the current response as stale
+        
+        Only HTTP requests get snapshots; background samplers should see the outage as it is.
+        """
+        if not has_request_context():
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.served += 1
+        metrics.cache('jenkins_snapshot', entry is not None)
+        if entry is None:
+            return None
+        g.jenkins_snapshot_at = max(entry[0], getattr(g, 'jenkins_snapshot_at', 0))
+        return entry[1]
+
+jenkins_breaker = CircuitBreaker(JENKINS_CIRCUIT_FAILURES, JENKINS_CIRCUIT_RESET_SECONDS)
+jenkins_snapshots = SnapshotCache(JENKINS_SNAPSHOT_SIZE)
+
+class LazyJenkins:
+    """python-jenkins client that connects on first use and reconnects in the background
+    
+    Truthiness reports whether a client exists (so `if jenkins_server:` keeps working). Method
+    calls are forwarded to the underlying jenkins.Jenkins instance through the circuit breaker;
+    get_* results are kept as snapshots and returned while Jenkins is unhealthy.
+    """
+    
+    def __init__(self, url, username, password, timeout, reconnect_interval):
+        self._server = None
+        self.url = url
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.reconnect_interval = reconnect_interval
+        self.state = 'idle'   # idle -> connected, or unavailable while the reconnect thread retries
+        self.last_error = None
+        self.connected_at = None
+        self.on_connect = []
+        self._lock = threading.Lock()
+        self._reconnect_thread = None
+        jenkins_breaker.on_open.append(self._start_reconnect)
+    
+    def connect(self):
+        """Create the client and check it with get_info(); True when connected"""
+        with self._lock:
+            if self._server is not None:
+                return True
+            try:
+                server = jenkins.Jenkins(self.url, username=self.username, password=self.password, timeout=self.timeout)
+                info = server.get_info()
+            except Exception as e:
+                self.state = 'unavailable'
+                self.last_error = str(e)
+                print(f"[ERROR] Failed to connect to Jenkins: {e}")
+                self._start_reconnect()
+                return False
+            self._server = server
+            self.state = 'connected'
+            self.last_error = None
+            self.connected_at = time.time()
+            print("Successfully connected to Jenkins")
+            print(f"[DEBUG] Jenkins info: {info}")
+        for callback in self.on_connect:
+            callback()
+        return True
+    
+    def _start_reconnect(self):
+        if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+            return
+        self._reconnect_thread = threading.Thread(target=self._reconnect_loop, name='JenkinsReconnect', daemon=True)
+        self._reconnect_thread.start()
+    
+    def _reconnect_loop(self):
+        """Retry the connection, then probe health until the circuit closes"""
+        while True:
+            time.sleep(self.reconnect_interval)
+            if not self.connect():
+                continue
+            if jenkins_breaker.state == 'closed' or self.probe():
+                return
+    
+    def probe(self):
+        """Health check that bypasses the breaker; closes or re-opens it"""
+        try:
+            self._server.get_info()
+        except Exception as e:
+            self.last_error = str(e)
+            jenkins_breaker.record_failure()
+            return False
+        jenkins_breaker.record_success()
+        return True
+    
+    def call(self, name, *args, **kwargs):
+        """Call a python-jenkins method through the circuit breaker"""
+        key = None
+        if name.startswith('get_') and name not in JENKINS_SNAPSHOT_EXCLUDE:
+            key = ('client', name, repr(args), repr(sorted(kwargs.items())))
+        if not jenkins_breaker.allow():
+            snapshot = jenkins_snapshots.recall(key) if key is not None else None
+            if snapshot is not None:
+                return snapshot
+            raise JenkinsUnavailable(f"Jenkins is unavailable (circuit open): {self.last_error}")
+        try:
+            with outbound_call('jenkins_client', name):
+                result = getattr(self._server, name)(*args, **kwargs)
+        except Exception as e:
+            if not _is_jenkins_outage(e):
+                # Jenkins answered, it just rejected the request
+                jenkins_breaker.record_success()
+                raise
+            self.last_error = str(e)
+            jenkins_breaker.record_failure()
+            snapshot = jenkins_snapshots.recall(key) if key is not None else None
+            if snapshot is not None:
+                return snapshot
+            raise
+        jenkins_breaker.record_success()
+        if key is not None:
+            jenkins_snapshots.remember(key, result)
+        return result
+    
+    def health(self):
+        return {
+            'state': self.state,
+            'url': self.url,
+            'connected_at': self.connected_at,
+            'last_error': self.last_error,
+            'circuit': jenkins_breaker.status(),
+            'snapshots': {'stored': len(jenkins_snapshots.entries), 'served': jenkins_snapshots.served}
+        }
+    
+    def __bool__(self):
+        if self._server is not None:
+            return True
+        # Only the very first use blocks on a connection attempt; afterwards the
+        # reconnect thread does the retrying and callers fail fast
+        if self.state == 'idle':
+            return self.connect()
+        return False
+    
+    def __getattr__(self, name):
+        if self._server is None and not self:
+            raise jenkins.JenkinsException(f"Jenkins server not connected: {self.last_error}")
+        attribute = getattr(self._server, name)
+        if not callable(attribute):
+            return attribute
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+# Jenkins client; nothing connects until the first request needs it
+jenkins_server = LazyJenkins(JENKINS_URL, JENKINS_USERNAME, JENKINS_PASSWORD, JENKINS_TIMEOUT, JENKINS_RECONNECT_INTERVAL)
 
 # FIXED: Enhanced required plugins list with all dependencies
 REQUIRED_PLUGINS = {
@@ -94,15 +487,153 @@ REQUIRED_PLUGINS = {
     ]
 }
 
+# Upper bound for parallel test shards in AI-generated pipelines
+MAX_TEST_SHARDS = 16
+
+# Gradle has no command-line switch for Test.maxParallelForks, so generated
+# pipelines write this init script and pass the fork count as -PtestForks
+GRADLE_TEST_FORKS_INIT = 'allprojects { tasks.withType(Test).configureEach { maxParallelForks = (project.properties.testForks ?: 1) as int } }'
+GRADLE_TEST_FORKS_STEP = f"writeFile file: 'test-forks.gradle', text: '''{GRADLE_TEST_FORKS_INIT}'''"
+
+# Generated commands starting with these are Jenkins pipeline steps, emitted without a shell wrapper
+PIPELINE_STEP_PREFIXES = ('writeFile ',)
+
+# Pipeline cost estimation settings
+ESTIMATE_MAX_REFERENCE_JOBS = int(os.getenv('ESTIMATE_MAX_REFERENCE_JOBS', 25))
+ESTIMATE_DEFAULT_STAGE_MS = 60000  # Used for stages with no historical match
+
+# Keywords used to match stages with different names but the same purpose
+STAGE_CATEGORIES = {
+    'checkout': ['checkout', 'clone', 'scm'],
+    'install': ['install', 'dependenc', 'setup', 'restore'],
+    'lint': ['lint', 'static', 'quality', 'sonar', 'format'],
+    'test': ['test', 'validate', 'verify', 'spec'],
+    'build': ['build', 'compile', 'package'],
+    'archive': ['archive', 'artifact', 'publish'],
+    'deploy': ['deploy', 'release']
+}
+
+# Build history / duration regression settings
+BUILD_HISTORY_DB = os.getenv('BUILD_HISTORY_DB', 'build_history.db')
+BUILD_SYNC_INTERVAL = int(os.getenv('BUILD_SYNC_INTERVAL', 60))   # Seconds between background build history syncs
+BUILD_SYNC_MIN_AGE = 30        # On-demand syncs are skipped if one finished this recently
+REGRESSION_THRESHOLD = float(os.getenv('REGRESSION_THRESHOLD', 0.25))
+REGRESSION_MIN_BUILDS = 3      # Builds needed in each window before a job is judged
+ROLLING_MEDIAN_WINDOW = 5      # Builds per point of the rolling median trend
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Queue monitor settings
+QUEUE_SAMPLE_INTERVAL = int(os.getenv('QUEUE_SAMPLE_INTERVAL', 5))
+QUEUE_WAIT_ALERT_SECONDS = int(os.getenv('QUEUE_WAIT_ALERT_SECONDS', 600))
+QUEUE_HISTORY_SIZE = 5000      # Finished queue waits kept for the distributions
+QUEUE_DEPTH_SAMPLES = 720      # One hour of depth samples at the default interval
+QUEUE_CANCEL_WORKERS = 8
+QUEUE_WAIT_POLL_SECONDS = 2    # Shared poll interval for queue items someone is waiting on
+QUEUE_WAIT_MAX_TIMEOUT = 60
+
+# Node utilization sampler settings
+NODE_SAMPLE_INTERVAL = int(os.getenv('NODE_SAMPLE_INTERVAL', 30))
+NODE_SAMPLE_HISTORY = 2880     # One day of samples at the default interval
+NODE_TREE = (
+    'computer[displayName,description,numExecutors,offline,offlineCauseReason,temporarilyOffline,'
+    'assignedLabels[name],executors[idle],oneOffExecutors[idle],monitorData[*]]'
+)
+
+# Batch node operation settings
+NODE_BATCH_WORKERS = int(os.getenv('NODE_BATCH_WORKERS', 8))
+NODE_BATCH_ACTIONS = ('offline', 'online', 'delete', 'drain')
+NODE_DRAIN_POLL_SECONDS = 5
+NODE_DRAIN_MAX_TIMEOUT = 3600
+
+# Job type index / batch build settings
+JOB_INDEX_TTL = int(os.getenv('JOB_INDEX_TTL', 300))
+JOB_INDEX_RETRY_SECONDS = 30   # Wait this long after a failed reload before trying again
+BUILD_BATCH_WORKERS = int(os.getenv('BUILD_BATCH_WORKERS', 4))
+BUILD_BATCH_RATE = float(os.getenv('BUILD_BATCH_RATE', 5))   # Build submissions per second
+BUILD_BATCH_MAX = 200
+NON_BUILDABLE_CLASSES = [
+    'com.cloudbees.hudson.plugins.folder.Folder',
+    'jenkins.branch.OrganizationFolder'
+]
+
+# Job listing settings
+JOBS_PAGE_SIZE = 100
+JOBS_MAX_PAGE_SIZE = 500
+JOBS_MAX_DEPTH = 3
+FOLDER_JOB_TYPES = ('folder', 'multibranch', 'organization')
+JOB_LIST_FIELDS = 'name,fullName,_class,color,description,lastBuild[number,result,building,timestamp,duration]'
+JOB_SEARCH_TTL = int(os.getenv('JOB_SEARCH_TTL', 30))
+JOB_SEARCH_CHECK_SECONDS = 2     # How often the background rebuilder checks whether the index is stale
+JOB_SEARCH_IDLE_SECONDS = 600    # Stop rebuilding when nobody has searched for this long
+JOB_SORT_FIELDS = ('name', 'timestamp', 'duration', 'status')
+
+# Default tree= projections for the job/build detail endpoints (fields=* returns everything)
+JOB_INFO_FIELDS = ('_class,name,fullName,url,description,color,buildable,inQueue,builds[number],'
+                   'lastBuild[number],lastSuccessfulBuild[number],lastFailedBuild[number]')
+BUILD_INFO_FIELDS = '_class,number,url,displayName,description,result,building,timestamp,duration,estimatedDuration,queueId'
+TREE_FIELDS_PATTERN = re.compile(r'^[\w,\[\]{}]+$')
+
+# Capacity advisor settings
+ADVISOR_DEFAULT_BUILD_MS = 5 * 60 * 1000   # Assumed duration of jobs without stored history
+ADVISOR_TARGET_UTILIZATION = 0.8           # Steady-state utilization the advisor sizes pools for
+ADVISOR_ANY_LABEL = '(any)'                # Pool for queue items without a label restriction
+
+# Federation settings: the controller configured by JENKINS_URL plus any listed in
+# JENKINS_CONTROLLERS as JSON, e.g. [{"name": "east", "url": "https://east:8080", "username": "...", "password": "..."}]
+JENKINS_NAME = os.getenv('JENKINS_NAME', 'default')
+JENKINS_CONTROLLERS = os.getenv('JENKINS_CONTROLLERS', '')
+FEDERATION_TIMEOUT = float(os.getenv('FEDERATION_TIMEOUT', 8))   # Seconds a federated request waits for the slowest controller
+FEDERATION_CONTROLLER_WORKERS = int(os.getenv('FEDERATION_CONTROLLER_WORKERS', 4))   # Concurrent fetches per controller
+FEDERATION_QUEUE_TREE = 'items[id,inQueueSince,blocked,buildable,stuck,why,task[name,url]]'
+FEDERATION_STATS_TREES = {
+    'jobs': ('', 'jobs[name]'),
+    'nodes': ('computer', 'computer[offline,numExecutors,executors[idle]]'),
+    'queue': ('queue', 'items[id]')
+}
+
+# Response serialization / caching / compression settings
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')   # 'orjson' (when installed) or 'default'
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+GZIP_COMPRESS_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def jenkins_request(method, path, operation=None, timeout=10, **kwargs):
+    """Send a REST request to Jenkins through the circuit breaker and return the response
+    
+    Raises JenkinsUnavailable without calling Jenkins while the circuit is open; connection
+    errors, timeouts and 5xx responses count towards opening it.
+    """
+    if not jenkins_breaker.allow():
+        raise JenkinsUnavailable(f"Jenkins is unavailable (circuit open): {jenkins_server.last_error}")
+    try:
+        with outbound_call('jenkins_rest', operation or _metric_path(path)) as call:
+            response = requests.request(
+                method,
+                f"{JENKINS_URL}/{path.lstrip('/')}",
+                auth=HTTPBasicAuth(JENKINS_USERNAME, JENKINS_PASSWORD),
+                timeout=timeout,
+                **kwargs
+            )
+            if response.status_code >= 500:
+                call['outcome'] = 'error'
+    except Exception as e:
+        if _is_jenkins_outage(e):
+            jenkins_server.last_error = str(e)
+            jenkins_breaker.record_failure()
+        else:
+            jenkins_breaker.record_success()
+        raise
+    if response.status_code >= 500:
+        jenkins_server.last_error = f"{response.status_code} {response.reason} from {path}"
+        jenkins_breaker.record_failure()
+    else:
+        jenkins_breaker.record_success()
+    return response
+
 def get_jenkins_crumb():
     """Get Jenkins CSRF crumb for API requests (Jenkins 2.440+)"""
     try:
-        crumb_url = f"{JENKINS_URL}/crumbIssuer/api/json"
-        response = requests.get(
-            crumb_url,
-            auth=HTTPBasicAuth(JENKINS_USERNAME, JENKINS_PASSWORD),
-            timeout=10
-        )
+        response = jenkins_request('GET', 'crumbIssuer/api/json')
         if response.status_code == 200:
             crumb_data = response.json()
             return {crumb_data['crumbRequestField']: crumb_data['crumb']}
@@ -122,13 +653,7 @@ def check_plugins_via_api():
             'Content-Type': 'application/json'
         })
         
-        plugins_url = f"{JENKINS_URL}/pluginManager/api/json?depth=1"
-        response = requests.get(
-            plugins_url,
-            auth=HTTPBasicAuth(JENKINS_USERNAME, JENKINS_PASSWORD),
-            headers=headers,
-            timeout=10
-        )
+        response = jenkins_request('GET', 'pluginManager/api/json', params={'depth': 1}, headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -192,9 +717,6 @@ def install_plugins_via_api(plugin_list):
             'Content-Type': 'application/x-www-form-urlencoded'
         })
         
-        # Use the newer plugin installation endpoint
-        install_url = f"{JENKINS_URL}/pluginManager/install"
-        
         # Format plugins for installation
         plugin_data = []
         for plugin in plugin_list:
@@ -202,13 +724,8 @@ def install_plugins_via_api(plugin_list):
         
         post_data = "&".join(plugin_data)
         
-        response = requests.post(
-            install_url,
-            auth=HTTPBasicAuth(JENKINS_USERNAME, JENKINS_PASSWORD),
-            headers=headers,
-            data=post_data,
-            timeout=30
-        )
+        # Use the newer plugin installation endpoint
+        response = jenkins_request('POST', 'pluginManager/install', headers=headers, data=post_data, timeout=30)
         
         if response.status_code in [200, 302]:
             return True, f"Successfully initiated installation of plugins: {', '.join(plugin_list)}"
@@ -784,15 +1301,8 @@ def create_job_via_api(job_name, config_xml):
             'Accept': 'application/json'
         })
         
-        create_url = f"{JENKINS_URL}/createItem?name={job_name}"
-        
-        response = requests.post(
-            create_url,
-            auth=HTTPBasicAuth(JENKINS_USERNAME, JENKINS_PASSWORD),
-            headers=headers,
-            data=config_xml,
-            timeout=30
-        )
+        response = jenkins_request('POST', 'createItem', params={'name': job_name},
+                                   headers=headers, data=config_xml, timeout=30)
         
         if response.status_code in [200, 201]:
             return True, "Job created successfully"
@@ -801,6 +1311,1613 @@ def create_job_via_api(job_name, config_xml):
             
     except Exception as e:
         return False, f"Request failed: {str(e)}"
+
+def _job_url_path(job_name):
+    """Build the URL path for a (possibly folder-nested) job name, e.g. a/b -> job/a/job/b"""
+    return '/'.join(f"job/{quote(part, safe='')}" for part in job_name.strip('/').split('/'))
+
+def get_pipeline_runs(job_name):
+    """Get recent Pipeline runs with per-stage timings from the Pipeline Stage View API (wfapi)"""
+    try:
+        response = jenkins_request('GET', f"{_job_url_path(job_name)}/wfapi/runs")
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(f"[DEBUG] wfapi runs not available for {job_name}: {response.status_code}")
+            return []
+    except Exception as e:
+        print(f"[ERROR] Error getting pipeline runs for {job_name}: {e}")
+        return []
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None entries are ignored)"""
+    ordered = sorted(value for value in values if value is not None)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+def build_stage_timings(job_name, max_builds=10, regression_threshold=0.2):
+    """Aggregate per-stage durations of recent Pipeline runs into a columnar structure with p50/p95"""
+    # wfapi/runs returns newest first; Jenkins caps it at 10 runs unless
+    # -Dcom.cloudbees.workflow.rest.external.JobExt.maxRunsPerJob is raised
+    runs = [run for run in get_pipeline_runs(job_name) if run.get('status') != 'IN_PROGRESS'][:max_builds]
+    runs.reverse()  # oldest first so each column reads left-to-right in time
+    
+    build_numbers = []
+    stage_names = []
+    durations = {}
+    for column, run in enumerate(runs):
+        build_numbers.append(int(run.get('id', 0)) if str(run.get('id', '')).isdigit() else run.get('id'))
+        for stage in run.get('stages', []):
+            name = stage.get('name', '')
+            if name not in durations:
+                stage_names.append(name)
+                durations[name] = [None] * len(runs)
+            durations[name][column] = stage.get('durationMillis')
+    
+    # Compare the most recent fifth of the window against the older builds
+    recent_count = max(1, len(runs) // 5)
+    summary = {}
+    for name in stage_names:
+        values = durations[name]
+        baseline_p50 = _percentile(values[:-recent_count], 50)
+        recent_p50 = _percentile(values[-recent_count:], 50)
+        change = None
+        if baseline_p50 and recent_p50 is not None:
+            change = round((recent_p50 - baseline_p50) / baseline_p50, 3)
+        summary[name] = {
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'baseline_p50': baseline_p50,
+            'recent_p50': recent_p50,
+            'change': change,
+            'regressed': change is not None and change > regression_threshold
+        }
+    
+    return {
+        'builds': build_numbers,
+        'stages': stage_names,
+        'durations': durations,
+        'summary': summary,
+        'regression_threshold': regression_threshold
+    }
+
+def _normalize_stage_name(stage_name):
+    """Lower-case a stage name and collapse punctuation so similar stages compare equal"""
+    return re.sub(r'[^a-z0-9]+', ' ', str(stage_name).lower()).strip()
+
+def _stage_category(stage_name):
+    """Map a stage name onto a coarse category (build, test, deploy, ...) or None"""
+    normalized = _normalize_stage_name(stage_name)
+    for category, keywords in STAGE_CATEGORIES.items():
+        if any(keyword in normalized for keyword in keywords):
+            return category
+    return None
+
+def _parse_jenkinsfile_stages(jenkinsfile):
+    """Extract top-level stages and their parallel branches from a declarative Jenkinsfile"""
+    stage_pattern = re.compile(r"""stage\s*\(\s*['"](.+?)['"]\s*\)\s*\{""")
+    
+    def find_block_end(text, open_index):
+        depth = 0
+        for index in range(open_index, len(text)):
+            if text[index] == '{':
+                depth += 1
+            elif text[index] == '}':
+                depth -= 1
+                if depth == 0:
+                    return index
+        return len(text) - 1
+    
+    def parse_stage_list(body):
+        stages = []
+        position = 0
+        while True:
+            match = stage_pattern.search(body, position)
+            if not match:
+                break
+            open_index = match.end() - 1
+            close_index = find_block_end(body, open_index)
+            stage_body = body[open_index + 1:close_index]
+            
+            branches = []
+            parallel_match = re.search(r'\bparallel\s*\{', stage_body)
+            if parallel_match:
+                parallel_open = parallel_match.end() - 1
+                parallel_close = find_block_end(stage_body, parallel_open)
+                branches = parse_stage_list(stage_body[parallel_open + 1:parallel_close])
+            
+            stages.append({
+                'name': match.group(1),
+                'has_agent': not branches and bool(re.search(r'^\s*agent\s', stage_body, re.MULTILINE)),
+                'parallel': branches
+            })
+            position = close_index + 1
+        return stages
+    
+    stages_match = re.search(r'\bstages\s*\{', jenkinsfile or '')
+    if not stages_match:
+        return []
+    stages_open = stages_match.end() - 1
+    return parse_stage_list(jenkinsfile[stages_open + 1:find_block_end(jenkinsfile, stages_open)])
+
+def _list_pipeline_job_names(limit):
+    """Names of existing Pipeline jobs, used as reference history for estimates"""
+    jobs = jenkins_server.get_jobs()
+    return [
+        job.get('fullname', job['name']) for job in jobs
+        if _detect_job_type(job.get('_class', '')) == 'pipeline'
+    ][:limit]
+
+def estimate_pipeline_cost(jenkinsfile, reference_jobs=None):
+    """Predict critical-path duration and executor-minutes of a Jenkinsfile from historical stage timings"""
+    stages = _parse_jenkinsfile_stages(jenkinsfile)
+    if not stages:
+        return None, "No stages found in Jenkinsfile"
+    
+    if reference_jobs is None:
+        reference_jobs = _list_pipeline_job_names(ESTIMATE_MAX_REFERENCE_JOBS)
+    
+    # Collect durations of successful stages, keyed by exact name and by category
+    durations_by_name = defaultdict(list)
+    durations_by_category = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for runs in pool.map(get_pipeline_runs, reference_jobs):
+            for run in runs or []:
+                if run.get('status') not in ['SUCCESS', 'UNSTABLE']:
+                    continue
+                for stage in run.get('stages', []):
+                    duration = stage.get('durationMillis')
+                    if not duration:
+                        continue
+                    durations_by_name[_normalize_stage_name(stage.get('name', ''))].append(duration)
+                    category = _stage_category(stage.get('name', ''))
+                    if category:
+                        durations_by_category[category].append(duration)
+    
+    def estimate_stage(stage_name):
+        exact = durations_by_name.get(_normalize_stage_name(stage_name))
+        if exact:
+            return int(statistics.median(exact)), 'exact', len(exact)
+        category = _stage_category(stage_name)
+        if category and durations_by_category.get(category):
+            samples = durations_by_category[category]
+            duration = statistics.median(samples)
+            # A shard named "Test Shard 2/4" runs roughly a quarter of the historical test stage
+            shard_match = re.search(r'(\d+)\s*/\s*(\d+)', stage_name)
+            if shard_match and int(shard_match.group(2)) > 0:
+                duration = duration / int(shard_match.group(2))
+            return int(duration), 'category', len(samples)
+        return ESTIMATE_DEFAULT_STAGE_MS, 'default', 0
+    
+    stage_estimates = []
+    critical_path_ms = 0
+    branch_executor_ms = 0
+    for stage in stages:
+        if stage['parallel']:
+            branches = []
+            for branch in stage['parallel']:
+                duration, match_type, samples = estimate_stage(branch['name'])
+                branches.append({'name': branch['name'], 'duration_ms': duration, 'match': match_type,
+                                 'samples': samples, 'own_executor': branch['has_agent']})
+                if branch['has_agent']:
+                    branch_executor_ms += duration
+            stage_ms = max(branch['duration_ms'] for branch in branches)
+            stage_estimates.append({'name': stage['name'], 'duration_ms': stage_ms, 'match': 'parallel',
+                                    'branches': branches})
+        else:
+            stage_ms, match_type, samples = estimate_stage(stage['name'])
+            stage_estimates.append({'name': stage['name'], 'duration_ms': stage_ms, 'match': match_type,
+                                    'samples': samples})
+        critical_path_ms += stage_ms
+    
+    # The top-level agent is held for the whole run; branches with their own agent hold one more each
+    executor_ms = critical_path_ms + branch_executor_ms
+    
+    unmatched_stages = [stage['name'] for stage in stage_estimates if stage['match'] == 'default']
+    unmatched_stages += [
+        branch['name'] for stage in stage_estimates for branch in stage.get('branches', [])
+        if branch['match'] == 'default'
+    ]
+    
+    return {
+        'stages': stage_estimates,
+        'critical_path_ms': critical_path_ms,
+        'critical_path_minutes': round(critical_path_ms / 60000, 2),
+        'executor_minutes': round(executor_ms / 60000, 2),
+        'reference_jobs': len(reference_jobs),
+        'unmatched_stages': unmatched_stages
+    }, None
+
+def get_jenkins_json(path='', tree=None, timeout=10):
+    """GET <path>/api/json from Jenkins, optionally narrowed with a tree= query; None on failure
+    
+    Goes through the Jenkins circuit breaker: while it is open the last good response for the
+    same path and tree is returned (or None) without calling Jenkins.
+    """
+    key = ('rest', path.strip('/'), tree)
+    try:
+        url = f"{path.strip('/')}/api/json" if path.strip('/') else "api/json"
+        params = {'tree': tree} if tree else None
+        response = jenkins_request('GET', url, operation=_metric_path(path), params=params, timeout=timeout)
+        if response.status_code >= 500:
+            print(f"[DEBUG] Jenkins API {url} returned {response.status_code}")
+            return jenkins_snapshots.recall(key)
+        if response.status_code == 200:
+            data = response.json()
+            jenkins_snapshots.remember(key, data)
+            return data
+        else:
+            print(f"[DEBUG] Jenkins API {url} returned {response.status_code}")
+            return None
+    except JenkinsUnavailable:
+        return jenkins_snapshots.recall(key)
+    except Exception as e:
+        print(f"[ERROR] Error calling Jenkins API {path or '/'}: {e}")
+        if _is_jenkins_outage(e):
+            return jenkins_snapshots.recall(key)
+        return None
+
+def _top_level_fields(tree):
+    """Names selected at the outermost level of a tree= expression"""
+    names, depth, current = [], 0, ''
+    for char in tree:
+        if char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            names.append(current)
+            current = ''
+        elif depth == 0:
+            current += char
+    names.append(current)
+    return names
+
+def requested_tree(default_fields, required=()):
+    """Map the request's fields= parameter to a Jenkins tree= query; None selects the whole object"""
+    fields = request.args.get('fields', default_fields).replace(' ', '')
+    if fields == '*':
+        return None
+    if not TREE_FIELDS_PATTERN.match(fields) or fields.count('[') != fields.count(']'):
+        raise ValueError(f"Invalid fields parameter: {fields}")
+    missing = [name for name in required if name not in _top_level_fields(fields)]
+    return ','.join(missing + [fields])
+
+class BuildHistoryStore:
+    """Append-only SQLite store of finished build metadata, synced incrementally per job"""
+    
+    # Columns added after the first release of the store, migrated in place
+    EXTRA_COLUMNS = {
+        'url': 'TEXT',
+        'display_name': 'TEXT',
+        'queue_id': 'INTEGER',
+        'keep_log': 'INTEGER'
+    }
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # The (job, number) primary key doubles as the per-job lookup index
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS builds (
+                    job TEXT NOT NULL,
+                    number INTEGER NOT NULL,
+                    timestamp INTEGER,
+                    duration INTEGER,
+                    result TEXT,
+                    PRIMARY KEY (job, number)
+                )
+            ''')
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(builds)')}
+            for column, column_type in self.EXTRA_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE builds ADD COLUMN {column} {column_type}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_builds_timestamp ON builds (timestamp)')
+            # Highest build number per job below which every build is finished and stored
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    job TEXT PRIMARY KEY,
+                    last_number INTEGER NOT NULL
+                )
+            ''')
+    
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; each request thread gets its own"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def append_builds(self, job_name, builds):
+        """Insert finished builds that are not stored yet; returns the number of new rows"""
+        rows = [
+            (job_name, build['number'], build.get('timestamp'), build.get('duration'), build.get('result'),
+             build.get('url'), build.get('displayName'), build.get('queueId'), int(bool(build.get('keepLog'))))
+            for build in builds
+            if build.get('number') is not None and not build.get('building') and build.get('result')
+        ]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO builds (job, number, timestamp, duration, result, url, display_name, queue_id, keep_log) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            return conn.total_changes - before
+    
+    def get_sync_number(self, job_name):
+        """Highest build number already synced for a job (0 if never synced)"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT last_number FROM sync_state WHERE job = ?', (job_name,)).fetchone()
+            return row[0] if row else 0
+    
+    def get_sync_numbers(self):
+        """Map of job name to highest synced build number"""
+        with self._connect() as conn:
+            return dict(conn.execute('SELECT job, last_number FROM sync_state').fetchall())
+    
+    def set_sync_number(self, job_name, number):
+        """Record the highest synced build number for a job"""
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO sync_state (job, last_number) VALUES (?, ?) '
+                'ON CONFLICT(job) DO UPDATE SET last_number = excluded.last_number',
+                (job_name, number)
+            )
+    
+    def get_builds(self, job_name, limit=100, before=None):
+        """Stored builds of a job (older than build number before), newest first, shaped like the Jenkins build API"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT number, url, timestamp, duration, result, display_name, queue_id, keep_log '
+                'FROM builds WHERE job = ? AND number < ? ORDER BY number DESC LIMIT ?',
+                (job_name, before if before is not None else 2 ** 62, limit)
+            ).fetchall()
+        return [{
+            'number': number,
+            'url': url,
+            'timestamp': timestamp,
+            'duration': duration,
+            'result': result,
+            'building': False,
+            'displayName': display_name or f'#{number}',
+            'id': str(number),
+            'keepLog': bool(keep_log),
+            'queueId': queue_id
+        } for number, url, timestamp, duration, result, display_name, queue_id, keep_log in rows]
+    
+    def load_durations(self, since_ms, results=('SUCCESS', 'UNSTABLE')):
+        """Return (job, timestamp, duration) rows newer than since_ms, grouped by job in build order"""
+        placeholders = ', '.join('?' for _ in results)
+        with self._connect() as conn:
+            return conn.execute(
+                f'SELECT job, timestamp, duration FROM builds '
+                f'WHERE timestamp >= ? AND duration IS NOT NULL AND result IN ({placeholders}) '
+                f'ORDER BY job, number',
+                (since_ms, *results)
+            ).fetchall()
+    
+    def summary(self, since_ms):
+        """Build counts overall and since since_ms, with the success rate of the recent builds"""
+        with self._connect() as conn:
+            total_builds, total_jobs = conn.execute('SELECT COUNT(*), COUNT(DISTINCT job) FROM builds').fetchone()
+            recent_builds, recent_successes = conn.execute(
+                "SELECT COUNT(*), SUM(result = 'SUCCESS') FROM builds WHERE timestamp >= ?",
+                (since_ms,)
+            ).fetchone()
+        return {
+            'stored_builds': total_builds,
+            'stored_jobs': total_jobs,
+            'recent_builds': recent_builds,
+            'recent_success_rate': round(recent_successes / recent_builds, 3) if recent_builds else None
+        }
+
+build_history = BuildHistoryStore(BUILD_HISTORY_DB)
+
+BUILD_SYNC_FIELDS = 'number,url,timestamp,duration,result,building,displayName,queueId,keepLog'
+
+def sync_job_builds(job_name, page_size=50):
+    """Fetch only builds newer than the stored watermark and append the finished ones
+    
+    Returns the job color and any in-progress builds, or None if Jenkins could not be reached.
+    """
+    last_number = build_history.get_sync_number(job_name)
+    job_color = None
+    new_builds = []
+    start = 0
+    while True:
+        tree = f'color,allBuilds[{BUILD_SYNC_FIELDS}]{{{start},{start + page_size}}}'
+        data = get_jenkins_json(_job_url_path(job_name), tree=tree)
+        if data is None:
+            return None
+        if start == 0:
+            job_color = data.get('color')
+        page = data.get('allBuilds') or []
+        new_builds.extend(build for build in page if build.get('number', 0) > last_number)
+        # allBuilds is newest first: stop once the page reaches already-synced builds
+        if len(page) < page_size or page[-1].get('number', 0) <= last_number:
+            break
+        start += page_size
+    
+    building = [build for build in new_builds if build.get('building')]
+    build_history.append_builds(job_name, new_builds)
+    if new_builds:
+        # Keep running builds above the watermark so they are picked up once they finish
+        if building:
+            watermark = min(build['number'] for build in building) - 1
+        else:
+            watermark = max(build['number'] for build in new_builds)
+        if watermark > last_number:
+            build_history.set_sync_number(job_name, watermark)
+    return {'color': job_color, 'building': building}
+
+def sync_all_build_history():
+    """Sync every job (inside folders too, keyed by full name) whose last build is beyond its watermark
+    
+    Returns the number of jobs synced, or None if Jenkins could not be reached.
+    """
+    jobs = list_all_jobs()
+    if jobs is None:
+        return None
+    synced = build_history.get_sync_numbers()
+    stale_jobs = [
+        job['name'] for job in jobs
+        if (job['last_build_number'] or 0) > synced.get(job['name'], 0)
+    ]
+    if stale_jobs:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(sync_job_builds, stale_jobs))
+        print(f"[INFO] Build history synced {len(stale_jobs)} jobs")
+    return len(stale_jobs)
+
+def detect_duration_regressions(threshold=REGRESSION_THRESHOLD, recent_days=7, baseline_days=28):
+    """Flag jobs whose median duration over the recent window exceeds the baseline median by threshold"""
+    now_ms = int(time.time() * 1000)
+    recent_start = now_ms - int(recent_days * DAY_MS)
+    baseline_start = recent_start - int(baseline_days * DAY_MS)
+    
+    rows = build_history.load_durations(baseline_start)
+    if not rows:
+        return [], 0
+    jobs = np.array([row[0] for row in rows])
+    timestamps = np.array([row[1] for row in rows], dtype=np.int64)
+    durations = np.array([row[2] for row in rows], dtype=np.float64)
+    
+    # Rows are ordered by job, so each job is one contiguous slice
+    boundaries = np.flatnonzero(jobs[1:] != jobs[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(jobs)]))
+    
+    regressions = []
+    for start, end in zip(starts, ends):
+        job_durations = durations[start:end]
+        is_recent = timestamps[start:end] >= recent_start
+        recent = job_durations[is_recent]
+        baseline = job_durations[~is_recent]
+        if len(recent) < REGRESSION_MIN_BUILDS or len(baseline) < REGRESSION_MIN_BUILDS:
+            continue
+        baseline_median = float(np.median(baseline))
+        recent_median = float(np.median(recent))
+        if baseline_median <= 0:
+            continue
+        change = (recent_median - baseline_median) / baseline_median
+        if change <= threshold:
+            continue
+        
+        if len(job_durations) >= ROLLING_MEDIAN_WINDOW:
+            windows = np.lib.stride_tricks.sliding_window_view(job_durations, ROLLING_MEDIAN_WINDOW)
+            rolling = np.median(windows, axis=1)
+        else:
+            rolling = np.array([np.median(job_durations)])
+        regressions.append({
+            'job': str(jobs[start]),
+            'baseline_median_ms': int(baseline_median),
+            'recent_median_ms': int(recent_median),
+            'change': round(change, 3),
+            'baseline_builds': int(len(baseline)),
+            'recent_builds': int(len(recent)),
+            'rolling_median_ms': rolling.astype(np.int64).tolist()
+        })
+    
+    regressions.sort(key=lambda item: item['change'], reverse=True)
+    return regressions, len(starts)
+
+class PeriodicSampler:
+    """Call sample() every interval seconds on a background daemon thread"""
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start sampling; calling it again while running is a no-op"""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop_event.set()
+    
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"[ERROR] {type(self).__name__} sample failed: {e}")
+            self._stop_event.wait(self.interval)
+    
+    def sample(self):
+        raise NotImplementedError
+
+class BuildHistorySampler(PeriodicSampler):
+    """Keeps the build history store up to date so request handlers only read from SQLite"""
+    
+    def __init__(self, interval):
+        super().__init__(interval)
+        self.synced_at = 0
+    
+    def sample(self):
+        self.sync(BUILD_SYNC_MIN_AGE)
+    
+    def sync(self, max_age):
+        """Sync unless a sync finished less than max_age seconds ago; one sync runs at a time"""
+        with self.lock:
+            if time.time() - self.synced_at < max_age:
+                return 0
+            synced_jobs = sync_all_build_history()
+            if synced_jobs is not None:
+                self.synced_at = time.time()
+            return synced_jobs
+
+build_sync = BuildHistorySampler(BUILD_SYNC_INTERVAL)
+jenkins_server.on_connect.append(build_sync.start)
+
+# Jenkins only reports the label a queue item waits for in its "why" text
+QUEUE_LABEL_PATTERNS = [
+    re.compile(r"executor on [‘'](.+?)[’']"),
+    re.compile(r"label [‘'](.+?)[’']"),
+    re.compile(r"^[‘'](.+?)[’'] is offline")
+]
+
+def _queue_item_label(why):
+    """Extract the label a queue item is waiting for from its 'why' message"""
+    for pattern in QUEUE_LABEL_PATTERNS:
+        match = pattern.search(why or '')
+        if match:
+            return match.group(1)
+    return None
+
+def _wait_distribution(entries, key):
+    """Group wait times by key and summarise each group with count/p50/p90/p95/max"""
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[entry.get(key) or '(any)'].append(entry['wait_ms'])
+    return {
+        name: {
+            'count': len(waits),
+            'p50': _percentile(waits, 50),
+            'p90': _percentile(waits, 90),
+            'p95': _percentile(waits, 95),
+            'max': max(waits)
+        }
+        for name, waits in groups.items()
+    }
+
+class QueueMonitor(PeriodicSampler):
+    """Samples the build queue and tracks how long each item waits and why"""
+    
+    MAX_TRANSITIONS = 50
+    
+    def __init__(self, interval, alert_seconds):
+        super().__init__(interval)
+        self.alert_seconds = alert_seconds
+        self.items = {}                                   # queue id -> tracked item
+        self.finished = deque(maxlen=QUEUE_HISTORY_SIZE)  # items that left the queue
+        self.depth = deque(maxlen=QUEUE_DEPTH_SAMPLES)    # (time, total, blocked, stuck, buildable)
+    
+    def sample(self):
+        data = get_jenkins_json('queue', tree='items[id,inQueueSince,blocked,buildable,stuck,why,task[name]]')
+        if data is not None:
+            self.record(data.get('items', []), int(time.time() * 1000))
+    
+    def record(self, queue_items, now_ms):
+        """Fold one queue snapshot into the tracked items"""
+        with self.lock:
+            seen = set()
+            for item in queue_items:
+                queue_id = item.get('id')
+                seen.add(queue_id)
+                why = item.get('why') or ''
+                state = (bool(item.get('blocked')), bool(item.get('stuck')), why)
+                
+                tracked = self.items.get(queue_id)
+                if tracked is None:
+                    tracked = self.items[queue_id] = {
+                        'id': queue_id,
+                        'job': (item.get('task') or {}).get('name', 'Unknown'),
+                        'label': None,
+                        'in_queue_since': item.get('inQueueSince') or now_ms,
+                        'transitions': [],
+                        'alerted': False
+                    }
+                # The label only shows up once the item waits for an executor
+                tracked['label'] = _queue_item_label(why) or tracked['label']
+                if not tracked['transitions'] or tuple(tracked['transitions'][-1][1:]) != state:
+                    tracked['transitions'].append([now_ms, *state])
+                    del tracked['transitions'][:-self.MAX_TRANSITIONS]
+                tracked.update(blocked=state[0], stuck=state[1], why=why, last_seen=now_ms)
+                
+                wait_ms = now_ms - tracked['in_queue_since']
+                if not tracked['alerted'] and (wait_ms > self.alert_seconds * 1000 or tracked['stuck']):
+                    tracked['alerted'] = True
+                    print(f"[ALERT] Queue item {queue_id} ({tracked['job']}) waiting {wait_ms // 1000}s: {why}")
+            
+            for queue_id in [queue_id for queue_id in self.items if queue_id not in seen]:
+                tracked = self.items.pop(queue_id)
+                self.finished.append({
+                    'job': tracked['job'],
+                    'label': tracked['label'],
+                    'in_queue_since': tracked['in_queue_since'],
+                    'wait_ms': tracked['last_seen'] - tracked['in_queue_since'],
+                    'left_at': now_ms
+                })
+            
+            self.depth.append((
+                now_ms,
+                len(queue_items),
+                sum(1 for item in queue_items if item.get('blocked')),
+                sum(1 for item in queue_items if item.get('stuck')),
+                sum(1 for item in queue_items if item.get('buildable'))
+            ))
+    
+    def snapshot(self, window_minutes=60):
+        """Current waits, alerts, wait distributions and queue depth over the window"""
+        now_ms = int(time.time() * 1000)
+        since_ms = now_ms - int(window_minutes * 60000)
+        with self.lock:
+            waiting = [{
+                'id': tracked['id'],
+                'job': tracked['job'],
+                'label': tracked['label'],
+                'why': tracked['why'],
+                'blocked': tracked['blocked'],
+                'stuck': tracked['stuck'],
+                'in_queue_since': tracked['in_queue_since'],
+                'wait_ms': now_ms - tracked['in_queue_since'],
+                'transitions': [
+                    {'time': time_ms, 'blocked': blocked, 'stuck': stuck, 'why': why}
+                    for time_ms, blocked, stuck, why in tracked['transitions']
+                ]
+            } for tracked in self.items.values()]
+            finished = [entry for entry in self.finished if entry['left_at'] >= since_ms]
+            depth = [sample for sample in self.depth if sample[0] >= since_ms]
+        
+        waiting.sort(key=lambda item: item['wait_ms'], reverse=True)
+        return {
+            'sampling': self.is_running(),
+            'sample_interval': self.interval,
+            'alert_seconds': self.alert_seconds,
+            'window_minutes': window_minutes,
+            'waiting': waiting,
+            'alerts': [item for item in waiting if item['stuck'] or item['wait_ms'] > self.alert_seconds * 1000],
+            'by_label': _wait_distribution(finished + waiting, 'label'),
+            'by_job': _wait_distribution(finished + waiting, 'job'),
+            'finished_items': len(finished),
+            'depth': {
+                'timestamps': [sample[0] for sample in depth],
+                'total': [sample[1] for sample in depth],
+                'blocked': [sample[2] for sample in depth],
+                'stuck': [sample[3] for sample in depth],
+                'buildable': [sample[4] for sample in depth]
+            }
+        }
+
+    def arrival_rates(self, window_minutes=60):
+        """Queue arrivals per hour for each label over the window (items that never waited a sample are missed)"""
+        since_ms = int(time.time() * 1000) - int(window_minutes * 60000)
+        counts = defaultdict(int)
+        with self.lock:
+            entries = list(self.finished) + list(self.items.values())
+        for entry in entries:
+            if entry['in_queue_since'] >= since_ms:
+                counts[entry.get('label') or ADVISOR_ANY_LABEL] += 1
+        return {label: count * 60.0 / window_minutes for label, count in counts.items()}
+
+queue_monitor = QueueMonitor(QUEUE_SAMPLE_INTERVAL, QUEUE_WAIT_ALERT_SECONDS)
+jenkins_server.on_connect.append(queue_monitor.start)
+
+class QueueItemWatcher(PeriodicSampler):
+    """Resolves queue ids to build numbers; one polling thread serves every waiting request"""
+    
+    MAX_RESOLVED = 1000
+    
+    def __init__(self, interval):
+        super().__init__(interval)
+        self.condition = threading.Condition(self.lock)
+        self.watched = {}               # queue id -> number of waiting requests
+        self.reasons = {}               # queue id -> latest 'why' while still queued
+        self.resolved = OrderedDict()   # queue id -> final state, oldest evicted first
+    
+    def sample(self):
+        with self.lock:
+            queue_ids = list(self.watched)
+        updates = {}
+        reasons = {}
+        for queue_id in queue_ids:
+            data = get_jenkins_json(f'queue/item/{queue_id}', tree='why,cancelled,executable[number,url],task[name,url]')
+            if data is None:
+                continue
+            task = data.get('task') or {}
+            executable = data.get('executable')
+            if executable:
+                updates[queue_id] = {
+                    'status': 'started',
+                    'job': _job_name_from_url(task.get('url')) or task.get('name'),
+                    'build_number': executable.get('number'),
+                    'build_url': executable.get('url')
+                }
+            elif data.get('cancelled'):
+                updates[queue_id] = {'status': 'cancelled', 'job': _job_name_from_url(task.get('url')) or task.get('name')}
+            else:
+                reasons[queue_id] = data.get('why')
+        with self.condition:
+            self.reasons.update(reasons)
+            for queue_id, state in updates.items():
+                self.resolved[queue_id] = state
+                self.reasons.pop(queue_id, None)
+            while len(self.resolved) > self.MAX_RESOLVED:
+                self.resolved.popitem(last=False)
+            self.condition.notify_all()
+    
+    def wait(self, queue_id, timeout_seconds):
+        """Block until the queue item starts or is cancelled; returns None on timeout"""
+        self.start()
+        deadline = time.time() + timeout_seconds
+        with self.condition:
+            self.watched[queue_id] = self.watched.get(queue_id, 0) + 1
+            try:
+                while queue_id not in self.resolved:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None
+                    self.condition.wait(remaining)
+                return self.resolved[queue_id]
+            finally:
+                self.watched[queue_id] -= 1
+                if not self.watched[queue_id]:
+                    del self.watched[queue_id]
+    
+    def reason(self, queue_id):
+        with self.lock:
+            return self.reasons.get(queue_id)
+
+queue_watcher = QueueItemWatcher(QUEUE_WAIT_POLL_SECONDS)
+
+class NodeDrainWatcher(PeriodicSampler):
+    """Tracks drains started by /api/nodes/batch; one polling thread checks every active drain"""
+    
+    MAX_DRAINS = 200
+    
+    def __init__(self, interval):
+        super().__init__(interval)
+        self.drains = OrderedDict()   # drain id -> state, oldest evicted first
+        self.ids = itertools.count(1)
+    
+    def add(self, node_names, timeout_seconds):
+        """Watch nodes that were just taken offline until they are idle; returns the drain id"""
+        now = time.time()
+        with self.lock:
+            drain_id = str(next(self.ids))
+            self.drains[drain_id] = {
+                'id': drain_id,
+                'status': 'draining',
+                'timeout': timeout_seconds,
+                'started_at': now,
+                'finished_at': None,
+                'busy': list(node_names),
+                'drained': []
+            }
+            finished = [key for key, drain in self.drains.items() if drain['status'] != 'draining']
+            for key in finished[:max(0, len(self.drains) - self.MAX_DRAINS)]:
+                del self.drains[key]
+        self.start()
+        return drain_id
+    
+    def sample(self):
+        with self.lock:
+            if not any(drain['status'] == 'draining' for drain in self.drains.values()):
+                return
+        nodes = get_all_nodes()
+        busy_nodes = None if nodes is None else {node['name'] for node in nodes if node['busyExecutors']}
+        now = time.time()
+        with self.lock:
+            for drain in self.drains.values():
+                if drain['status'] != 'draining':
+                    continue
+                if busy_nodes is not None:
+                    drain['drained'] += [name for name in drain['busy'] if name not in busy_nodes]
+                    drain['busy'] = [name for name in drain['busy'] if name in busy_nodes]
+                if not drain['busy']:
+                    drain['status'] = 'drained'
+                elif now - drain['started_at'] >= drain['timeout']:
+                    drain['status'] = 'timed_out'
+                if drain['status'] != 'draining':
+                    drain['finished_at'] = now
+    
+    def get(self, drain_id):
+        with self.lock:
+            drain = self.drains.get(drain_id)
+            if drain is None:
+                return None
+            return dict(drain, busy=list(drain['busy']), drained=list(drain['drained']))
+
+node_drains = NodeDrainWatcher(NODE_DRAIN_POLL_SECONDS)
+
+def _monitor_value(monitor_data, monitor, field):
+    """Read one field of a node monitor result (monitors report null while they have no data)"""
+    value = (monitor_data or {}).get(f'hudson.node_monitors.{monitor}')
+    return value.get(field) if isinstance(value, dict) else None
+
+def get_all_nodes():
+    """Get every node with executors, labels and monitor data in a single computer API request"""
+    data = get_jenkins_json('computer', tree=NODE_TREE)
+    if data is None:
+        return None
+    return _summarize_nodes(data)
+
+def _summarize_nodes(data):
+    """Flatten a NODE_TREE computer response into the node shape the UI renders"""
+    nodes = []
+    for computer in data.get('computer', []):
+        executors = computer.get('executors') or []
+        busy = sum(1 for executor in executors if not executor.get('idle', True))
+        monitor_data = computer.get('monitorData') or {}
+        nodes.append({
+            'name': computer.get('displayName'),
+            'displayName': computer.get('displayName'),
+            'description': computer.get('description'),
+            'executors': computer.get('numExecutors', 0),
+            'busyExecutors': busy,
+            'idleExecutors': max(0, computer.get('numExecutors', 0) - busy),
+            'offline': computer.get('offline', False),
+            'offlineCause': computer.get('offlineCauseReason') or None,
+            'temporarilyOffline': computer.get('temporarilyOffline', False),
+            'labels': [label.get('name') for label in computer.get('assignedLabels') or []],
+            'monitorData': monitor_data,
+            'diskFreeBytes': _monitor_value(monitor_data, 'DiskSpaceMonitor', 'size'),
+            'swapFreeBytes': _monitor_value(monitor_data, 'SwapSpaceMonitor', 'availableSwapSpace'),
+            'responseTimeMs': _monitor_value(monitor_data, 'ResponseTimeMonitor', 'average')
+        })
+    return nodes
+
+class NodeMonitor(PeriodicSampler):
+    """Records busy/idle executors and monitor data per node into a ring buffer"""
+    
+    def __init__(self, interval):
+        super().__init__(interval)
+        # (time, {node name: (busy, executors, offline, labels, disk, swap, response ms)})
+        self.samples = deque(maxlen=NODE_SAMPLE_HISTORY)
+    
+    def sample(self):
+        nodes = get_all_nodes()
+        if nodes is not None:
+            self.record(nodes, int(time.time() * 1000))
+    
+    def record(self, nodes, now_ms):
+        snapshot = {
+            node['name']: (
+                node['busyExecutors'], node['executors'], node['offline'], tuple(node['labels']),
+                node['diskFreeBytes'], node['swapFreeBytes'], node['responseTimeMs']
+            )
+            for node in nodes
+        }
+        with self.lock:
+            self.samples.append((now_ms, snapshot))
+    
+    def utilization(self, window_minutes=60):
+        """Executor utilization percentiles per label plus per-node series over the window"""
+        since_ms = int(time.time() * 1000) - int(window_minutes * 60000)
+        with self.lock:
+            samples = [sample for sample in self.samples if sample[0] >= since_ms]
+        
+        # One utilization ratio per sample and label, counting online executors only
+        label_ratios = defaultdict(list)
+        label_busy = defaultdict(list)
+        for _, snapshot in samples:
+            busy_by_label = defaultdict(int)
+            total_by_label = defaultdict(int)
+            for busy, executors, offline, labels, *_ in snapshot.values():
+                if offline or not executors:
+                    continue
+                for label in labels:
+                    busy_by_label[label] += busy
+                    total_by_label[label] += executors
+            for label, total in total_by_label.items():
+                label_ratios[label].append(busy_by_label[label] / total)
+                label_busy[label].append(busy_by_label[label])
+        
+        latest = samples[-1][1] if samples else {}
+        by_label = {}
+        for label, ratios in label_ratios.items():
+            members = [name for name, values in latest.items() if label in values[3]]
+            by_label[label] = {
+                'nodes': members,
+                'executors': sum(latest[name][1] for name in members if not latest[name][2]),
+                'samples': len(ratios),
+                'mean': round(sum(ratios) / len(ratios), 3),
+                'p50': round(_percentile(ratios, 50), 3),
+                'p90': round(_percentile(ratios, 90), 3),
+                'p95': round(_percentile(ratios, 95), 3),
+                'max': round(max(ratios), 3),
+                'peak_busy_executors': max(label_busy[label])
+            }
+        
+        node_series = {}
+        for name in latest:
+            rows = [snapshot.get(name) for _, snapshot in samples]
+            node_series[name] = {
+                'busy': [row[0] if row else None for row in rows],
+                'executors': [row[1] if row else None for row in rows],
+                'offline': [row[2] if row else None for row in rows],
+                'disk_free_bytes': [row[4] if row else None for row in rows],
+                'swap_free_bytes': [row[5] if row else None for row in rows],
+                'response_time_ms': [row[6] if row else None for row in rows]
+            }
+        
+        return {
+            'sampling': self.is_running(),
+            'sample_interval': self.interval,
+            'window_minutes': window_minutes,
+            'timestamps': [sample[0] for sample in samples],
+            'by_label': by_label,
+            'nodes': node_series
+        }
+
+node_monitor = NodeMonitor(NODE_SAMPLE_INTERVAL)
+jenkins_server.on_connect.append(node_monitor.start)
+
+# The built-in node is listed by display name but addressed as (built-in) / (master) in URLs
+BUILT_IN_COMPUTER_PATHS = {'Built-In Node': '(built-in)', 'built-in': '(built-in)', 'master': '(master)'}
+
+def toggle_node_offline(node_name, message=''):
+    """Flip a node's temporarily-offline flag with one toggleOffline POST"""
+    computer = BUILT_IN_COMPUTER_PATHS.get(node_name, node_name)
+    response = jenkins_request(
+        'POST',
+        f"computer/{quote(computer, safe='')}/toggleOffline",
+        params={'offlineMessage': message},
+        headers=get_jenkins_crumb(),
+        allow_redirects=False
+    )
+    if response.status_code >= 400:
+        raise jenkins.JenkinsException(f"toggleOffline returned {response.status_code}")
+
+def _apply_node_action(node_name, node, action, message):
+    """Apply one batch action to a node and report the outcome instead of raising
+    
+    `node` comes from the batch's get_all_nodes() snapshot, so offline/online only toggle
+    nodes whose temporarilyOffline flag differs from the requested state.
+    """
+    if node is None:
+        return {'node': node_name, 'success': False, 'error': 'Node not found'}
+    try:
+        if action in ('offline', 'drain'):
+            if node['temporarilyOffline']:
+                return {'node': node_name, 'success': True, 'changed': False, 'message': 'Already offline'}
+            toggle_node_offline(node_name, message)
+            return {'node': node_name, 'success': True, 'changed': True, 'message': 'Taken offline'}
+        if action == 'online':
+            if not node['temporarilyOffline']:
+                message = 'Not marked offline; agent is disconnected' if node['offline'] else 'Already online'
+                return {'node': node_name, 'success': True, 'changed': False, 'message': message}
+            toggle_node_offline(node_name)
+            return {'node': node_name, 'success': True, 'changed': True, 'message': 'Brought online'}
+        if node_name in BUILT_IN_COMPUTER_PATHS:
+            return {'node': node_name, 'success': False, 'error': 'Cannot delete master/built-in node'}
+        jenkins_server.delete_node(node_name)
+        return {'node': node_name, 'success': True, 'changed': True, 'message': 'Deleted'}
+    except Exception as e:
+        return {'node': node_name, 'success': False, 'error': str(e)}
+
+class JobTypeIndex:
+    """In-memory job name -> _class/buildable index so handlers avoid downloading full job JSON
+    
+    Loaded from one tree query, reloaded after JOB_INDEX_TTL and updated by our own writes.
+    Jobs missing from the index (nested or created elsewhere) are fetched with a _class-only query.
+    Only one thread reloads at a time; the others keep using the current entries.
+    """
+    
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.jobs = {}
+        self.loaded_at = 0
+        self.failed_at = 0
+    
+    def refresh(self):
+        """Reload the top-level jobs; returns False if Jenkins could not be reached"""
+        data = get_jenkins_json(tree='jobs[name,_class,buildable]')
+        if data is None:
+            self.failed_at = time.time()
+            return False
+        with self.lock:
+            self.jobs = {
+                job['name']: {'_class': job.get('_class', ''), 'buildable': job.get('buildable', False)}
+                for job in data.get('jobs', [])
+            }
+            self.loaded_at = time.time()
+        return True
+    
+    def get(self, job_name):
+        """Index entry of a job, or None if Jenkins reports that it does not exist"""
+        self._refresh_if_stale()
+        with self.lock:
+            entry = self.jobs.get(job_name)
+        metrics.cache('job_index', entry is not None)
+        if entry is not None:
+            return entry
+        
+        response = jenkins_request('GET', f"{_job_url_path(job_name)}/api/json", operation='job/*',
+                                   params={'tree': '_class,buildable'})
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+        entry = {'_class': data.get('_class', ''), 'buildable': data.get('buildable', False)}
+        with self.lock:
+            self.jobs[job_name] = entry
+        return entry
+    
+    def _refresh_if_stale(self):
+        now = time.time()
+        if now - self.loaded_at <= self.ttl or now - self.failed_at < JOB_INDEX_RETRY_SECONDS:
+            return
+        if not self.refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if time.time() - self.loaded_at > self.ttl:
+                self.refresh()
+        finally:
+            self.refresh_lock.release()
+    
+    def get_class(self, job_name):
+        entry = self.get(job_name)
+        return entry['_class'] if entry else None
+    
+    def build_error(self, job_name):
+        """Why a build of the job cannot be queued, or None if it can"""
+        entry = self.get(job_name)
+        if entry is None:
+            return f'Job "{job_name}" not found'
+        # Some job types like folders and organization folders are not buildable
+        if entry['_class'] in NON_BUILDABLE_CLASSES:
+            return f'Job type "{_detect_job_type(entry["_class"])}" is not buildable'
+        # Multibranch projects may not report buildable; building one starts a branch scan
+        if not entry['buildable'] and _detect_job_type(entry['_class']) != 'multibranch':
+            return f'Job "{job_name}" is disabled or not buildable'
+        return None
+    
+    def job_type(self, job_name):
+        job_class = self.get_class(job_name)
+        return _detect_job_type(job_class) if job_class is not None else None
+    
+    def forget(self, job_name):
+        """Drop a job after we created, changed or deleted it; the next lookup refetches it"""
+        with self.lock:
+            self.jobs.pop(job_name, None)
+
+job_index = JobTypeIndex(JOB_INDEX_TTL)
+
+class RateLimiter:
+    """Spaces out calls shared by several worker threads to at most rate per second"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _matrix_value_lists(matrix):
+    """Matrix parameter names (sorted) and their value lists; a scalar counts as one value"""
+    names = sorted(matrix)
+    return names, [matrix[name] if isinstance(matrix[name], list) else [matrix[name]] for name in names]
+
+def _parameter_matrix_size(matrix):
+    """Number of combinations in a parameter matrix, without expanding it"""
+    return math.prod(len(values) for values in _matrix_value_lists(matrix)[1])
+
+def _expand_parameter_matrix(matrix, base_parameters=None):
+    """Cartesian product of matrix values, each combination merged over base_parameters"""
+    names, value_lists = _matrix_value_lists(matrix)
+    return [dict(base_parameters or {}, **dict(zip(names, values))) for values in itertools.product(*value_lists)]
+
+def _submit_build(job_name, parameters, limiter):
+    """Queue one build (after the rate limiter allows it) and return its queue id or error"""
+    result = {'job': job_name, 'parameters': parameters}
+    try:
+        error = job_index.build_error(job_name)
+        if error:
+            return dict(result, success=False, error=error)
+        limiter.wait()
+        if parameters:
+            queue_id = jenkins_server.build_job(job_name, parameters=parameters)
+        else:
+            queue_id = jenkins_server.build_job(job_name)
+        return dict(result, success=True, queue_id=queue_id)
+    except Exception as e:
+        return dict(result, success=False, error=str(e))
+
+def _job_tree_query(depth, start, end):
+    """tree= expression listing jobs depth levels deep, with the first level limited to [start, end)"""
+    fields = JOB_LIST_FIELDS
+    for _ in range(depth - 1):
+        fields = f'{JOB_LIST_FIELDS},jobs[{fields}]'
+    return f'jobs[{fields}]{{{start},{end}}}'
+
+def _summarize_job(job):
+    """Flatten a tree-query job entry into the shape the jobs view renders"""
+    job_type = _detect_job_type(job.get('_class', ''))
+    last_build = job.get('lastBuild') or {}
+    summary = {
+        'name': job.get('fullName') or job.get('name'),
+        'short_name': job.get('name'),
+        'job_type': job_type,
+        'color': job.get('color'),
+        'description': job.get('description'),
+        'result': last_build.get('result'),
+        'last_build_number': last_build.get('number'),
+        'building': last_build.get('building', False),
+        'timestamp': last_build.get('timestamp'),
+        'duration': last_build.get('duration'),
+        'has_children': job_type in FOLDER_JOB_TYPES
+    }
+    if 'jobs' in job:
+        summary['children'] = [_summarize_job(child) for child in job['jobs']]
+    return summary
+
+def list_jobs(folder='', depth=1, cursor=0, limit=JOBS_PAGE_SIZE):
+    """One page of a folder's jobs (depth levels deep) from a single tree query; returns (jobs, next_cursor)"""
+    path = _job_url_path(folder) if folder else ''
+    # Ask for one extra entry to learn whether another page exists
+    data = get_jenkins_json(path, tree=_job_tree_query(depth, cursor, cursor + limit + 1))
+    if data is None:
+        return None, None
+    jobs = [_summarize_job(job) for job in data.get('jobs', [])]
+    next_cursor = str(cursor + limit) if len(jobs) > limit else None
+    return jobs[:limit], next_cursor
+
+def list_all_jobs():
+    """Every job and folder at any depth, flattened in tree order; None if Jenkins could not be reached"""
+    jobs, _ = list_jobs(depth=JOBS_MAX_DEPTH, limit=1000000)
+    if jobs is None:
+        return None
+    entries = []
+    stack = list(reversed(jobs))
+    while stack:
+        job = stack.pop()
+        if job['has_children'] and 'children' not in job:
+            # A folder at the tree query's depth limit: list its contents with another query
+            children, _ = list_jobs(job['name'], depth=JOBS_MAX_DEPTH, limit=1000000)
+            if children is None:
+                return None
+            job['children'] = children
+        stack.extend(reversed(job.pop('children', [])))
+        entries.append(job)
+    return entries
+
+def _job_status(job):
+    """Single status keyword for filtering: building, disabled, notbuilt or the last result"""
+    color = job.get('color') or ''
+    if job.get('building') or color.endswith('_anime'):
+        return 'building'
+    if color == 'disabled':
+        return 'disabled'
+    if job.get('result'):
+        return job['result'].lower()
+    return 'notbuilt' if color in ('notbuilt', 'grey', '') else 'unknown'
+
+def _search_tokens(text):
+    return [token for token in re.split(r'[^a-z0-9]+', (text or '').lower()) if token]
+
+class JobSearchIndex(PeriodicSampler):
+    """Prebuilt in-memory index of all jobs (name tokens, description, type, last result) for /api/jobs search
+    
+    A background thread rebuilds it once it is older than ttl while searches keep being answered
+    from the previous build; only the first search (or one after a long idle period) waits.
+    """
+    
+    def __init__(self, ttl):
+        super().__init__(JOB_SEARCH_CHECK_SECONDS)
+        self.ttl = ttl
+        self.refresh_lock = threading.Lock()
+        self.entries = []
+        self.tokens = []      # Sorted distinct tokens, for prefix lookups with bisect
+        self.postings = {}    # token -> set of entry positions
+        self.loaded_at = 0
+        self.failed_at = 0
+        self.searched_at = 0
+    
+    def sample(self):
+        if time.time() - self.searched_at > JOB_SEARCH_IDLE_SECONDS:
+            return
+        self.load(self.ttl)
+    
+    def load(self, max_age):
+        """Rebuild unless the index is younger than max_age; concurrent callers share one rebuild"""
+        with self.refresh_lock:
+            if time.time() - self.loaded_at <= max_age:
+                return True
+            if time.time() - self.failed_at < JOB_SEARCH_CHECK_SECONDS:
+                return False
+            if not self.refresh():
+                self.failed_at = time.time()
+                return False
+            return True
+    
+    def refresh(self):
+        """Rebuild the index from recursive tree queries; returns False if Jenkins could not be reached"""
+        entries = list_all_jobs()
+        if entries is None:
+            return False
+        for job in entries:
+            job['status'] = _job_status(job)
+        
+        postings = defaultdict(set)
+        for position, entry in enumerate(entries):
+            for token in _search_tokens(entry['name']) + _search_tokens(entry['description']):
+                postings[token].add(position)
+        with self.lock:
+            self.entries = entries
+            self.postings = dict(postings)
+            self.tokens = sorted(postings)
+            self.loaded_at = time.time()
+        return True
+    
+    def invalidate(self):
+        """Mark the index stale so the background thread rebuilds it within a few seconds"""
+        with self.lock:
+            self.loaded_at = min(self.loaded_at, time.time() - self.ttl - 1)
+    
+    def _match_term(self, term):
+        """Positions of entries having a token that starts with term"""
+        matches = set()
+        start = bisect.bisect_left(self.tokens, term)
+        for token in itertools.islice(self.tokens, start, None):
+            if not token.startswith(term):
+                break
+            matches |= self.postings[token]
+        return matches
+    
+    def search(self, query='', job_type=None, status=None, folder='', sort='name'):
+        """All entries matching every query term and the filters, sorted; None if the index cannot load"""
+        self.start()
+        self.searched_at = time.time()
+        age = time.time() - self.loaded_at
+        metrics.cache('job_search', age <= self.ttl)
+        if age > JOB_SEARCH_IDLE_SECONDS and not self.load(JOB_SEARCH_IDLE_SECONDS) and not self.entries:
+            return None
+        with self.lock:
+            entries = self.entries
+            positions = None
+            for term in _search_tokens(query):
+                matches = self._match_term(term)
+                positions = matches if positions is None else positions & matches
+        
+        candidates = entries if positions is None else [entries[position] for position in sorted(positions)]
+        prefix = folder.strip('/') + '/' if folder else ''
+        results = [
+            entry for entry in candidates
+            if (not job_type or entry['job_type'] == job_type)
+            and (not status or entry['status'] == status)
+            and entry['name'].startswith(prefix)
+        ]
+        
+        descending = sort.startswith('-')
+        field = sort.lstrip('-')
+        if field == 'name':
+            results.sort(key=lambda entry: entry['name'].lower(), reverse=descending)
+        else:
+            # Jobs without the field (e.g. never built) always go last
+            present = [entry for entry in results if entry.get(field) is not None]
+            missing = [entry for entry in results if entry.get(field) is None]
+            results = sorted(present, key=lambda entry: entry[field], reverse=descending) + missing
+        return results
+
+job_search = JobSearchIndex(JOB_SEARCH_TTL)
+
+def job_changed(job_name):
+    """Drop cached job data after we created, reconfigured or deleted a job"""
+    job_index.forget(job_name)
+    job_search.invalidate()
+
+class JenkinsController:
+    """One controller in the federation, with its own pooled HTTP session and circuit breaker
+    
+    Fetches run on the controller's own small executor (a bulkhead): a hung controller can tie up
+    at most FEDERATION_CONTROLLER_WORKERS threads, and further requests report it busy.
+    """
+    
+    def __init__(self, name, url, username, password, breaker=None):
+        self.name = name
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(username, password)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=FEDERATION_CONTROLLER_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = breaker or CircuitBreaker(JENKINS_CIRCUIT_FAILURES, JENKINS_CIRCUIT_RESET_SECONDS)
+        self.executor = ThreadPoolExecutor(max_workers=FEDERATION_CONTROLLER_WORKERS, thread_name_prefix=f'federation-{name}')
+        self.slots = threading.BoundedSemaphore(FEDERATION_CONTROLLER_WORKERS)
+        self.last_latency_ms = None
+        self.last_error = None
+    
+    def get_json(self, path='', tree=None, deadline=None):
+        """GET <path>/api/json from this controller; raises on failure so callers can report it
+        
+        deadline (time.monotonic()) bounds all calls of one federated fetch together.
+        """
+        timeout = FEDERATION_TIMEOUT if deadline is None else deadline - time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError(f"{self.name}: no time left within {FEDERATION_TIMEOUT:g}s")
+        if not self.breaker.allow():
+            raise JenkinsUnavailable(f"{self.name} is unavailable (circuit open): {self.last_error}")
+        url = f"{self.url}/{path.strip('/')}/api/json" if path.strip('/') else f"{self.url}/api/json"
+        try:
+            with outbound_call('jenkins_federation', _metric_path(path), controller=self.name):
+                response = self.session.get(url, params={'tree': tree} if tree else None, timeout=timeout)
+                response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            self.last_error = str(e)
+            if _is_jenkins_outage(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return data
+    
+    def status(self):
+        return {
+            'name': self.name,
+            'url': self.url,
+            'circuit': self.breaker.status(),
+            'last_latency_ms': self.last_latency_ms,
+            'last_error': self.last_error
+        }
+
+def load_controllers():
+    """Controller registry: the JENKINS_URL controller first, then JENKINS_CONTROLLERS entries"""
+    registry = OrderedDict()
+    # The primary controller shares the breaker of jenkins_server so both agree on its health
+    registry[JENKINS_NAME] = JenkinsController(JENKINS_NAME, JENKINS_URL, JENKINS_USERNAME, JENKINS_PASSWORD,
+                                               breaker=jenkins_breaker)
+    if JENKINS_CONTROLLERS:
+        try:
+            entries = json.loads(JENKINS_CONTROLLERS)
+        except ValueError as e:
+            print(f"[ERROR] Ignoring invalid JENKINS_CONTROLLERS: {e}")
+            entries = []
+        for entry in entries:
+            if not entry.get('name') or not entry.get('url'):
+                print(f"[ERROR] Ignoring controller without name/url: {entry.get('name') or entry.get('url')}")
+                continue
+            if entry['name'] in registry:
+                print(f"[ERROR] Ignoring controller {entry['url']}: the name {entry['name']!r} is already in use")
+                continue
+            registry[entry['name']] = JenkinsController(
+                entry['name'], entry['url'],
+                entry.get('username', JENKINS_USERNAME), entry.get('password', JENKINS_PASSWORD)
+            )
+    return registry
+
+controllers = load_controllers()
+
+def _timed_fetch(fetch, controller, deadline):
+    started = time.perf_counter()
+    try:
+        return fetch(controller, deadline)
+    finally:
+        controller.last_latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        controller.slots.release()
+
+def federate(fetch):
+    """Run fetch(controller, deadline) on every controller concurrently
+    
+    Waits at most FEDERATION_TIMEOUT seconds; controllers that fail, have not answered by then or
+    are still busy with earlier requests are reported in the status list and left out of the
+    results. Returns (results by name, status).
+    """
+    deadline = time.monotonic() + FEDERATION_TIMEOUT
+    futures = {}   # controller name -> future, or None when the controller is busy
+    for controller in controllers.values():
+        if controller.slots.acquire(blocking=False):
+            futures[controller.name] = controller.executor.submit(_timed_fetch, fetch, controller, deadline)
+        else:
+            futures[controller.name] = None
+    done, _ = wait([future for future in futures.values() if future], timeout=max(0, deadline - time.monotonic()))
+    results, status = {}, []
+    for controller in controllers.values():
+        future = futures[controller.name]
+        entry = {'name': controller.name, 'url': controller.url, 'success': False}
+        if future is None:
+            entry['error'] = 'Busy: earlier requests to this controller have not finished'
+        elif future not in done:
+            entry['error'] = f"No response within {FEDERATION_TIMEOUT:g}s"
+        elif future.exception() is not None:
+            entry['error'] = str(future.exception())
+            entry['latency_ms'] = controller.last_latency_ms
+        else:
+            results[controller.name] = future.result()
+            entry['success'] = True
+            entry['latency_ms'] = controller.last_latency_ms
+        status.append(entry)
+    return results, status
+
+def _controller_jobs(controller, deadline):
+    data = controller.get_json('', tree=f'jobs[{JOB_LIST_FIELDS}]', deadline=deadline)
+    return [dict(_summarize_job(job), controller=controller.name) for job in data.get('jobs', [])]
+
+def _controller_queue(controller, deadline):
+    data = controller.get_json('queue', tree=FEDERATION_QUEUE_TREE, deadline=deadline)
+    return [dict(item, controller=controller.name) for item in data.get('items', [])]
+
+def _controller_nodes(controller, deadline):
+    data = controller.get_json('computer', tree=NODE_TREE, deadline=deadline)
+    return [dict(node, controller=controller.name) for node in _summarize_nodes(data)]
+
+def _controller_statistics(controller, deadline):
+    jobs = controller.get_json(*FEDERATION_STATS_TREES['jobs'], deadline=deadline).get('jobs', [])
+    computers = controller.get_json(*FEDERATION_STATS_TREES['nodes'], deadline=deadline).get('computer', [])
+    queue = controller.get_json(*FEDERATION_STATS_TREES['queue'], deadline=deadline).get('items', [])
+    online = [computer for computer in computers if not computer.get('offline')]
+    return {
+        'total_jobs': len(jobs),
+        'total_nodes': len(computers),
+        'online_nodes': len(online),
+        'executors': sum(computer.get('numExecutors', 0) for computer in online),
+        'busy_executors': sum(1 for computer in online for executor in computer.get('executors') or []
+                              if not executor.get('idle', True)),
+        'queue_size': len(queue)
+    }
+
+def _job_name_from_url(url):
+    """Full job name from a job or build URL, e.g. .../job/a/job/b/12/ -> a/b"""
+    return '/'.join(unquote(part) for part in re.findall(r'/job/([^/]+)', urlparse(url or '').path))
+
+def _erlang_c_wait(arrivals_per_ms, service_ms, servers):
+    """Mean queue wait in ms of an M/M/c queue, or None when the offered load exceeds capacity"""
+    load = arrivals_per_ms * service_ms
+    if servers <= 0 or load >= servers:
+        return None
+    if load == 0:
+        return 0.0
+    term = 1.0
+    partial_sum = 1.0
+    for k in range(1, servers):
+        term *= load / k
+        partial_sum += term
+    busy_term = term * load / servers * servers / (servers - load)
+    wait_probability = busy_term / (partial_sum + busy_term)
+    return wait_probability * service_ms / (servers - load)
+
+def advise_capacity(target_minutes=15, window_minutes=60, history_days=14):
+    """Join queue, node and build-duration data into per-label pool recommendations"""
+    queue_data = get_jenkins_json('queue', tree='items[id,inQueueSince,blocked,stuck,why,task[name,url]]')
+    nodes = get_all_nodes()
+    if queue_data is None or nodes is None:
+        return None, 'Failed to load queue or nodes from Jenkins'
+    
+    # Median duration of recent successful builds per job
+    job_durations = defaultdict(list)
+    for job, _, duration in build_history.load_durations(int(time.time() * 1000) - history_days * DAY_MS):
+        job_durations[job].append(duration)
+    job_medians = {job: statistics.median(values) for job, values in job_durations.items()}
+    
+    pools = defaultdict(lambda: {'queued': 0, 'blocked': 0, 'stuck': 0, 'work_ms': 0, 'longest_ms': 0, 'unknown_durations': 0})
+    for item in queue_data.get('items', []):
+        label = _queue_item_label(item.get('why')) or ADVISOR_ANY_LABEL
+        task = item.get('task') or {}
+        job = task.get('name') if task.get('name') in job_medians else _job_name_from_url(task.get('url'))
+        duration = job_medians.get(job)
+        pool = pools[label]
+        if duration is None:
+            duration = ADVISOR_DEFAULT_BUILD_MS
+            pool['unknown_durations'] += 1
+        pool['queued'] += 1
+        pool['blocked'] += int(bool(item.get('blocked')))
+        pool['stuck'] += int(bool(item.get('stuck')))
+        pool['work_ms'] += duration
+        pool['longest_ms'] = max(pool['longest_ms'], duration)
+    
+    online = [node for node in nodes if not node['offline']]
+    utilization = node_monitor.utilization(window_minutes)['by_label']
+    arrivals = queue_monitor.arrival_rates(window_minutes)
+    all_medians = list(job_medians.values())
+    typical_build_ms = statistics.median(all_medians) if all_medians else ADVISOR_DEFAULT_BUILD_MS
+    target_ms = target_minutes * 60000
+    
+    recommendations = []
+    for label in set(pools) | set(arrivals) | set(utilization):
+        pool = pools[label]
+        members = online if label == ADVISOR_ANY_LABEL else [node for node in online if label in node['labels']]
+        executors = sum(node['executors'] for node in members)
+        busy = sum(node['busyExecutors'] for node in members)
+        arrivals_per_hour = arrivals.get(label, 0.0)
+        service_ms = pool['work_ms'] / pool['queued'] if pool['queued'] else typical_build_ms
+        offered_load = arrivals_per_hour / 3600000.0 * service_ms
+        
+        # Executors needed to finish the queued work within the target, and to keep up with arrivals
+        drain_executors = math.ceil(pool['work_ms'] / target_ms) if pool['queued'] else 0
+        steady_executors = math.ceil(offered_load / ADVISOR_TARGET_UTILIZATION) if offered_load else 0
+        needed = max(drain_executors, steady_executors)
+        drain_ms = pool['work_ms'] / executors if executors else None
+        expected_wait_ms = _erlang_c_wait(arrivals_per_hour / 3600000.0, service_ms, executors)
+        utilization_p95 = (utilization.get(label) or {}).get('p95')
+        
+        reasons = []
+        if pool['queued'] and not executors:
+            reasons.append('No online executors for this label')
+        if drain_ms is not None and drain_ms > target_ms:
+            reasons.append(f'Queued work needs {round(drain_ms / 60000, 1)} min to drain')
+        if pool['longest_ms'] > target_ms:
+            reasons.append('A queued build alone takes longer than the target')
+        if executors and offered_load >= executors:
+            reasons.append('Arrival rate exceeds pool capacity')
+        if utilization_p95 is not None and utilization_p95 >= 0.9:
+            reasons.append(f'p95 utilization {int(utilization_p95 * 100)}%')
+        
+        recommendations.append({
+            'label': label,
+            'queued': pool['queued'],
+            'blocked': pool['blocked'],
+            'stuck': pool['stuck'],
+            'nodes': [node['name'] for node in members],
+            'online_executors': executors,
+            'busy_executors': busy,
+            'queued_work_minutes': round(pool['work_ms'] / 60000, 1),
+            'estimated_drain_minutes': round(drain_ms / 60000, 1) if drain_ms is not None else None,
+            'arrivals_per_hour': round(arrivals_per_hour, 2),
+            'offered_load': round(offered_load, 2),
+            'expected_wait_minutes': round(expected_wait_ms / 60000, 1) if expected_wait_ms is not None else None,
+            'utilization_p95': utilization_p95,
+            'recommended_executors': needed,
+            'additional_executors': max(0, needed - executors),
+            'durations_estimated': pool['unknown_durations'],
+            'bottleneck': bool(reasons),
+            'reasons': reasons
+        })
+    
+    recommendations.sort(key=lambda pool: (pool['bottleneck'], pool['additional_executors'], pool['queued']), reverse=True)
+    return {
+        'target_minutes': target_minutes,
+        'window_minutes': window_minutes,
+        'typical_build_minutes': round(typical_build_ms / 60000, 1),
+        'pools': recommendations
+    }, None
     
 class GitHubRepoAnalyzer:
     """AI-powered GitHub repository analyzer using Gemini with support for 2.0+ models and cross-platform shell commands"""
@@ -842,6 +2959,7 @@ class GitHubRepoAnalyzer:
     def __init__(self, model_name=None, fallback_enabled=True):
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY is required for repository analysis")
+        get_genai()
         
         self.fallback_enabled = fallback_enabled
         self.model_name = self._select_optimal_model(model_name)
@@ -901,7 +3019,7 @@ class GitHubRepoAnalyzer:
                 continue
         raise ValueError("No working Gemini model found")
 
-    def analyze_repository(self, repo_url, branch='main', env_shell_type='sh'):
+    def analyze_repository(self, repo_url, branch='main', env_shell_type='sh', test_shards=1):
         """Analyze GitHub repository with comprehensive structure analysis and environment support"""
         try:
             # Validate env_shell_type parameter
@@ -916,7 +3034,7 @@ class GitHubRepoAnalyzer:
             if not repo_structure:
                 return None, "Failed to fetch repository structure"
             
-            analysis_result = self._analyze_with_ai(repo_structure, repo_info, env_shell_type)
+            analysis_result = self._analyze_with_ai(repo_structure, repo_info, env_shell_type, test_shards)
             return analysis_result, None
             
         except Exception as e:
@@ -1338,7 +3456,8 @@ class GitHubRepoAnalyzer:
             print(f"[AI] Fetching comprehensive repository info: {repo_api_url}")
             
             import requests
-            repo_response = requests.get(repo_api_url, headers=headers, timeout=10, verify=False)
+            with outbound_call('github', 'repo'):
+                repo_response = requests.get(repo_api_url, headers=headers, timeout=10, verify=False)
             if repo_response.status_code == 404:
                 return None
             elif repo_response.status_code != 200:
@@ -1356,7 +3475,8 @@ class GitHubRepoAnalyzer:
             
             # Fetch root directory contents
             contents_url = f"https://api.github.com/repos/{owner}/{repo}/contents"
-            contents_response = requests.get(contents_url, headers=headers, timeout=10, verify=False)
+            with outbound_call('github', 'contents'):
+                contents_response = requests.get(contents_url, headers=headers, timeout=10, verify=False)
             
             if contents_response.status_code == 200:
                 contents = contents_response.json()
@@ -1368,7 +3488,8 @@ class GitHubRepoAnalyzer:
                 for readme_file in readme_files:
                     try:
                         print(f"[AI] Fetching README: {readme_file['name']}")
-                        readme_response = requests.get(readme_file['download_url'], timeout=10, verify=False)
+                        with outbound_call('github', 'readme'):
+                            readme_response = requests.get(readme_file['download_url'], timeout=10, verify=False)
                         if readme_response.status_code == 200:
                             readme_content = readme_response.text
                             key_files[readme_file['name']] = readme_content
@@ -1415,7 +3536,8 @@ class GitHubRepoAnalyzer:
                             any(pattern in file_name_lower for pattern in important_file_patterns)):
                             try:
                                 print(f"[AI] Fetching important file: {item['name']}")
-                                file_response = requests.get(item['download_url'], timeout=10, verify=False)
+                                with outbound_call('github', 'file'):
+                                    file_response = requests.get(item['download_url'], timeout=10, verify=False)
                                 if file_response.status_code == 200:
                                     content = file_response.text[:3000]  # Increased content size
                                     key_files[item['name']] = content
@@ -1427,7 +3549,8 @@ class GitHubRepoAnalyzer:
             
             # Get programming languages
             languages_url = f"https://api.github.com/repos/{owner}/{repo}/languages"
-            languages_response = requests.get(languages_url, headers=headers, timeout=10, verify=False)
+            with outbound_call('github', 'languages'):
+                languages_response = requests.get(languages_url, headers=headers, timeout=10, verify=False)
             languages = languages_response.json() if languages_response.status_code == 200 else {}
             
             # ENHANCED: Project analysis based on README and structure
@@ -1630,11 +3753,13 @@ class GitHubRepoAnalyzer:
 
     def _analyze_pom_xml(self, content):
         """Analyze pom.xml for Maven projects"""
-        return {'build_system': 'maven', 'dependencies': [], 'tools': ['Java', 'Maven']}
+        test_framework = 'junit' if 'junit' in str(content).lower() else 'unknown'
+        return {'build_system': 'maven', 'dependencies': [], 'test_framework': test_framework, 'tools': ['Java', 'Maven']}
 
     def _analyze_gradle_file(self, content):
         """Analyze build.gradle for Gradle projects"""
-        return {'build_system': 'gradle', 'dependencies': [], 'tools': ['Java', 'Gradle']}
+        test_framework = 'junit' if 'junit' in str(content).lower() else 'unknown'
+        return {'build_system': 'gradle', 'dependencies': [], 'test_framework': test_framework, 'tools': ['Java', 'Gradle']}
 
     def _analyze_go_mod(self, content):
         """Analyze go.mod for Go projects"""
@@ -1765,33 +3890,34 @@ class GitHubRepoAnalyzer:
         
         return analysis
 
-    def _analyze_with_ai(self, repo_structure, repo_info, env_shell_type='sh'):
+    def _analyze_with_ai(self, repo_structure, repo_info, env_shell_type='sh', test_shards=1):
         """Analyze repository with enhanced README-based analysis and environment support"""
         max_retries = 3
         base_delay = 33
         
         for attempt in range(max_retries):
             try:
-                prompt = self._build_comprehensive_analysis_prompt(repo_structure, repo_info, env_shell_type)
+                prompt = self._build_comprehensive_analysis_prompt(repo_structure, repo_info, env_shell_type, test_shards)
                 
                 # Apply model-specific optimizations
                 generation_config = self._get_model_config()
-                if generation_config:
-                    response = self.model.generate_content(prompt, generation_config=generation_config)
-                else:
-                    response = self.model.generate_content(prompt)
+                with outbound_call('gemini', self.model_name):
+                    if generation_config:
+                        response = self.model.generate_content(prompt, generation_config=generation_config)
+                    else:
+                        response = self.model.generate_content(prompt)
                 
                 if not response.text:
                     if attempt < max_retries - 1:
                         continue
-                    return self._generate_intelligent_fallback_analysis(repo_structure, env_shell_type)
+                    return self._generate_intelligent_fallback_analysis(repo_structure, env_shell_type, test_shards)
                 
                 analysis = self._parse_ai_response(response.text)
                 
                 # ENHANCED: Validate and enhance AI response
                 if self._is_generic_response(analysis):
                     print(f"[AI] Generic response detected, enhancing with README analysis...")
-                    analysis = self._enhance_with_readme_analysis(analysis, repo_structure, env_shell_type)
+                    analysis = self._enhance_with_readme_analysis(analysis, repo_structure, env_shell_type, test_shards)
                 
                 return analysis
                 
@@ -1817,11 +3943,11 @@ class GitHubRepoAnalyzer:
                 # For final attempt or non-recoverable errors
                 if attempt >= max_retries - 1:
                     print(f"[AI] Max retries exceeded, using intelligent fallback analysis")
-                    return self._generate_intelligent_fallback_analysis(repo_structure, env_shell_type)
+                    return self._generate_intelligent_fallback_analysis(repo_structure, env_shell_type, test_shards)
         
         return None
 
-    def _build_comprehensive_analysis_prompt(self, repo_structure, repo_info, env_shell_type='sh'):
+    def _build_comprehensive_analysis_prompt(self, repo_structure, repo_info, env_shell_type='sh', test_shards=1):
         """Build comprehensive analysis prompt with README-first approach and environment support"""
         
         # Extract key information
@@ -1852,6 +3978,16 @@ class GitHubRepoAnalyzer:
         
         current_shell_instruction = shell_instructions.get(env_shell_type, shell_instructions['sh'])
         
+        # Test sharding instruction - only when more than one shard is requested
+        test_sharding_instruction = ""
+        if test_shards > 1:
+            test_sharding_instruction = f"""
+TEST PARALLELISM:
+- Split the test suite into {test_shards} shards inside a `parallel` block, one stage per shard with its own `agent any`
+- Each shard stage must run `checkout scm` and install dependencies before running its slice of the tests
+- Use the test framework's native sharding: pytest-split (`python -m pytest --splits {test_shards} --group N`), `jest --shard=N/{test_shards}`, surefire forks (`mvn test -DforkCount={test_shards}`), or Gradle forks via an init script that sets `maxParallelForks` from a project property (`./gradlew test --init-script test-forks.gradle -PtestForks={test_shards}`); `--max-workers` does not fork test JVMs
+"""
+        
         # Enhanced prompt with shell environment specification
         thinking_instruction = f"""
 CRITICAL ANALYSIS APPROACH:
@@ -1910,7 +4046,7 @@ BUILD STRATEGY REQUIREMENTS:
 SHELL COMMAND FORMAT:
 - Use {env_shell_type} commands throughout the Jenkinsfile
 - Example format: {env_shell_type} 'command here'
-
+{test_sharding_instruction}
 RESPONSE FORMAT (JSON):
 {{
   "analysis": {{
@@ -1981,7 +4117,7 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
         
         return any(indicator in jenkinsfile for indicator in generic_indicators)
 
-    def _enhance_with_readme_analysis(self, analysis, repo_structure, env_shell_type='sh'):
+    def _enhance_with_readme_analysis(self, analysis, repo_structure, env_shell_type='sh', test_shards=1):
         """Enhance analysis using README content and project structure with environment support"""
         if not analysis:
             analysis = {}
@@ -2002,10 +4138,14 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
             )
             
             analysis['jenkinsfile'] = jenkinsfile
+            # The README pipeline replaces any sharded one the model produced
+            if isinstance(analysis.get('analysis'), dict):
+                analysis['analysis'].pop('test_shards', None)
+                analysis['analysis'].pop('test_shard_commands', None)
             analysis['explanation'] = f"Generated pipeline based on README instructions using {env_shell_type} commands. Detected commands: {run_commands}"
         else:
             # Fallback to smart analysis
-            analysis = self._generate_intelligent_fallback_analysis(repo_structure, env_shell_type)
+            analysis = self._generate_intelligent_fallback_analysis(repo_structure, env_shell_type, test_shards)
         
         return analysis
 
@@ -2189,7 +4329,7 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
 
 
 
-    def _generate_intelligent_fallback_analysis(self, repo_structure, env_shell_type='sh'):
+    def _generate_intelligent_fallback_analysis(self, repo_structure, env_shell_type='sh', test_shards=1):
         """Generate intelligent fallback analysis with enhanced dependency file analysis"""
         
         # ENHANCED: Safe data extraction with type checking
@@ -2231,8 +4371,17 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
             readme_content, dependency_analysis, key_files, files, languages, project_type
         )
         
+        # Split tests into shards for the detected test framework (a single entry means in-process forks)
+        test_shard_commands = self._generate_sharded_test_commands(dependency_analysis, test_shards)
+        readme_based = bool(readme_content and project_analysis.get('detected_commands', {}).get('run'))
+        # The README-based Jenkinsfile runs the README commands and ignores shards
+        shards_emitted = bool(test_shard_commands) and not readme_based
+        if len(test_shard_commands) == 1:
+            test_commands = test_shard_commands[0]
+            test_shard_commands = []
+        
         # Generate environment-specific Jenkinsfile
-        if readme_content and project_analysis.get('detected_commands', {}).get('run'):
+        if readme_based:
             jenkinsfile = self._generate_readme_based_jenkinsfile(
                 project_analysis.get('detected_commands', {}).get('run', []),
                 project_analysis.get('detected_commands', {}).get('install', []),
@@ -2245,7 +4394,8 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
             branch = 'main'  # Default branch
 
             jenkinsfile = self._generate_structure_based_jenkinsfile(
-                key_files, languages, build_commands, test_commands, env_shell_type, repo_url, branch
+                key_files, languages, build_commands, test_commands, env_shell_type, repo_url, branch,
+                test_shard_commands
             )
         
         # Enhanced analysis result
@@ -2262,7 +4412,7 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
                 "test_commands": test_commands,
                 "run_commands": project_analysis.get('detected_commands', {}).get('run', []),
                 "artifacts": artifacts,
-                "readme_based": bool(readme_content and project_analysis.get('detected_commands', {}).get('run')),
+                "readme_based": readme_based,
                 "shell_environment": env_shell_type,
                 "dependency_analysis": dependency_analysis
             },
@@ -2274,6 +4424,11 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
             "recommendations": self._generate_enhanced_recommendations(project_type, dependency_analysis, env_shell_type)
         }
         
+        # Report sharding only when the generated Jenkinsfile actually uses it
+        if shards_emitted:
+            analysis["analysis"]["test_shards"] = test_shards
+            analysis["analysis"]["test_shard_commands"] = test_shard_commands
+        
         return analysis
     
 
@@ -2398,6 +4553,47 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
         
         return build_commands, test_commands, artifacts
 
+    def _generate_sharded_test_commands(self, dependency_analysis, test_shards=1):
+        """Generate per-shard test commands for the detected test framework (jest, pytest, junit)"""
+        if test_shards <= 1:
+            return []
+        
+        build_system = dependency_analysis.get('build_system', 'custom')
+        test_framework = dependency_analysis.get('test_framework', 'unknown')
+        shards = []
+        
+        if test_framework == 'jest' and build_system in ['npm', 'yarn']:
+            # Jest 28+ native sharding
+            for index in range(1, test_shards + 1):
+                if build_system == 'yarn':
+                    shard_command = f'yarn test --shard={index}/{test_shards}'
+                else:
+                    shard_command = f'npm test -- --shard={index}/{test_shards}'
+                shards.append([f'{build_system} install', shard_command])
+        
+        elif test_framework == 'pytest' and build_system == 'pip':
+            # pytest-split divides the suite into groups of roughly equal duration
+            for index in range(1, test_shards + 1):
+                shards.append([
+                    'pip install -r requirements.txt',
+                    'pip install pytest-split',
+                    f'python -m pytest --splits {test_shards} --group {index}'
+                ])
+        
+        elif test_framework == 'junit':
+            # JVM builds parallelise through forked test JVMs within a single stage.
+            # build_system may be overwritten by the language fallback, so key off the source file.
+            primary_source = dependency_analysis.get('primary_source', '')
+            if primary_source == 'pom.xml':
+                shards.append([f'mvn test -DforkCount={test_shards} -DreuseForks=true'])
+            elif primary_source == 'build.gradle':
+                shards.append([
+                    GRADLE_TEST_FORKS_STEP,
+                    f'./gradlew test --init-script test-forks.gradle -PtestForks={test_shards}'
+                ])
+        
+        return shards
+
     def _detect_build_commands_from_structure(self, key_files, files, languages):
         """Detect build commands from project structure"""
         key_file_names = [f.lower() for f in key_files.keys()]
@@ -2474,17 +4670,19 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
         
         return build_commands, test_commands, artifacts
 
-    def _generate_structure_based_jenkinsfile(self, key_files, languages, build_commands, test_commands, env_shell_type='sh', repo_url='', branch='main'):
+    def _generate_structure_based_jenkinsfile(self, key_files, languages, build_commands, test_commands, env_shell_type='sh', repo_url='', branch='main', test_shard_commands=None):
         """Generate Jenkinsfile based on detected structure and build commands with environment-specific shell syntax and environment variables"""
         
         # Build command executor syntax based on environment
         def get_command_wrapper(env_type):
             if env_type == 'bat':
-                return lambda c: f'bat "{c}"'
+                wrap = lambda c: f'bat "{c}"'
             elif env_type == 'osascript':
-                return lambda c: f'osascript -e "{c}"'
+                wrap = lambda c: f'osascript -e "{c}"'
             else: # default to sh
-                return lambda c: f'sh \'{c}\''
+                wrap = lambda c: f'sh \'{c}\''
+            # Pipeline steps such as writeFile run the same under every shell
+            return lambda c: c if c.startswith(PIPELINE_STEP_PREFIXES) else wrap(c)
         
         cmd_wrapper = get_command_wrapper(env_shell_type)
         
@@ -2534,7 +4732,37 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
             }}"""
         
         test_stage = ""
-        if test_commands:
+        if test_shard_commands and len(test_shard_commands) > 1:
+            # One stage per shard, each on its own executor so the suite spreads across agents
+            shard_count = len(test_shard_commands)
+            shard_stages = ""
+            for index, shard_commands in enumerate(test_shard_commands, start=1):
+                shard_steps = "\n                                    ".join([cmd_wrapper(cmd) for cmd in shard_commands])
+                shard_stages += f"""
+                    stage('Test Shard {index}/{shard_count}') {{
+                        agent any
+                        steps {{
+                            checkout scm
+                            script {{
+                                try {{
+                                    {shard_steps}
+                                }} catch (Exception e) {{
+                                    echo 'Test shard {index} failed or not properly configured'
+                                }}
+                            }}
+                        }}
+                        post {{
+                            always {{
+                                cleanWs()
+                            }}
+                        }}
+                    }}"""
+            test_stage = f"""
+            stage('Test') {{
+                parallel {{{shard_stages}
+                }}
+            }}"""
+        elif test_commands:
             test_steps = "\n                        ".join([cmd_wrapper(cmd) for cmd in test_commands])
             test_stage = f"""
             stage('Test') {{
@@ -2636,15 +4864,112 @@ CRITICAL: Base your Jenkinsfile on what the README actually says, and use {env_s
         }
 
 
-# Initialize GitHub analyzer
-github_analyzer = GitHubRepoAnalyzer() if GEMINI_API_KEY else None
+# GitHub analyzer, created on the first AI request
+github_analyzer = None
+_github_analyzer_lock = threading.Lock()
+
+def get_github_analyzer():
+    """Shared GitHubRepoAnalyzer, or None when GEMINI_API_KEY is not configured"""
+    global github_analyzer
+    if not GEMINI_API_KEY:
+        return None
+    with _github_analyzer_lock:
+        if github_analyzer is None:
+            github_analyzer = GitHubRepoAnalyzer()
+    return github_analyzer
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Latency per route; registered before the other after_request hooks so it runs last"""
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        metrics.observe('jenkins_ui_request_duration_seconds', time.perf_counter() - started,
+                        method=request.method, route=request.url_rule.rule if request.url_rule else 'unmatched',
+                        status=str(response.status_code))
+    return response
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes responses with orjson
+    
+    Keys are sorted and debug output is indented as with the default provider, and dates go
+    through its default() so they keep the HTTP date format. Unlike the default provider,
+    non-ASCII text is written as UTF-8 rather than \\u escapes, and numpy values are encoded natively.
+    """
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                  | orjson.OPT_PASSTHROUGH_DATETIME)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        try:
+            body = orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:
+            # orjson rejects a few values the stdlib accepts (e.g. integers beyond 64 bits)
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+if JSON_PROVIDER == 'orjson' and orjson:
+    app.json = OrjsonProvider(app)
+
+def _response_encoding():
+    """Pick the best compression the client accepts, preferring brotli"""
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL)
+
+@app.after_request
+def mark_snapshot_response(response):
+    """Tell clients when (part of) a response came from a snapshot taken while Jenkins was healthy"""
+    snapshot_at = getattr(g, 'jenkins_snapshot_at', None)
+    if snapshot_at:
+        response.headers['X-Jenkins-Snapshot'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(snapshot_at))
+    return response
+
+@app.after_request
+def finalize_json_response(response):
+    """ETag/304 revalidation and compression for read-only JSON responses"""
+    if (request.method != 'GET' or response.status_code != 200
+            or response.mimetype != 'application/json'
+            or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+    
+    body = response.get_data()
+    etag = hashlib.sha1(body).hexdigest()
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    # Weak tag: the payload is the same whichever encoding it is sent with
+    response.set_etag(etag, weak=True)
+    
+    not_modified = request.if_none_match.contains_weak(etag)
+    metrics.cache('etag', not_modified)
+    if not_modified:
+        response.status_code = 304
+        response.set_data(b'')
+        return response
+    
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = _response_encoding()
+        if encoding:
+            response.set_data(_compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+    return response
 
 # NEW: AI Repository Analysis API Endpoints
 @app.route('/api/ai/analyze-repository', methods=['POST'])
 def analyze_repository():
     """Analyze GitHub repository with AI and generate Jenkinsfile with environment support"""
     try:
-        if not github_analyzer:
+        analyzer = get_github_analyzer()
+        if not analyzer:
             return jsonify({
                 'success': False,
                 'error': 'AI service not available. Please configure GEMINI_API_KEY.'
@@ -2662,6 +4987,12 @@ def analyze_repository():
         if env_shell_type not in ['sh', 'bat', 'osascript']:
             env_shell_type = 'sh'  # Default fallback
 
+        # Number of parallel test shards (1 = run tests serially)
+        try:
+            test_shards = max(1, min(int(data.get('test_shards', 1)), MAX_TEST_SHARDS))
+        except (TypeError, ValueError):
+            test_shards = 1
+
         if not repo_url:
             return jsonify({'success': False, 'error': 'Repository URL is required'})
 
@@ -2672,7 +5003,7 @@ def analyze_repository():
         print(f"[AI] Analyzing repository: {repo_url} for {env_shell_type} environment")
 
         # Analyze repository with shell environment parameter
-        analysis_result, error = github_analyzer.analyze_repository(repo_url, branch, env_shell_type)
+        analysis_result, error = analyzer.analyze_repository(repo_url, branch, env_shell_type, test_shards)
 
         if error:
             return jsonify({'success': False, 'error': error})
@@ -2687,7 +5018,8 @@ def analyze_repository():
             'analysis': analysis_result,
             'repository_url': repo_url,
             'branch': branch,
-            'env_shell_type': env_shell_type  # RETURN ENVIRONMENT TYPE
+            'env_shell_type': env_shell_type,  # RETURN ENVIRONMENT TYPE
+            'test_shards': test_shards
         })
 
     except Exception as e:
@@ -2726,17 +5058,35 @@ def create_pipeline_from_analysis():
 
         # Check if job already exists
         try:
-            jenkins_server.get_job_info(job_name)
-            return jsonify({'success': False, 'error': f'Job "{job_name}" already exists'})
-        except (jenkins.NotFoundException, jenkins.JenkinsException) as e:
-            if "does not exist" in str(e):
-                pass  # Job doesn't exist - expected for new job creation
-            else:
-                return jsonify({'success': False, 'error': f'Jenkins error: {str(e)}'})
+            if job_index.get(job_name) is not None:
+                return jsonify({'success': False, 'error': f'Job "{job_name}" already exists'})
+        except Exception as e:
+            return jsonify({'success': False, 'error': f'Jenkins error: {str(e)}'})
 
         # ✅ FIXED: Extract the generated Jenkinsfile content and use script mode
         jenkinsfile_content = analysis['jenkinsfile']
         
+        # Optionally reject pipeline shapes predicted to be too slow or too expensive
+        max_critical_path_minutes = data.get('max_critical_path_minutes')
+        max_executor_minutes = data.get('max_executor_minutes')
+        estimate = None
+        if max_critical_path_minutes or max_executor_minutes:
+            estimate, estimate_error = estimate_pipeline_cost(jenkinsfile_content)
+            if estimate_error:
+                return jsonify({'success': False, 'error': f'Failed to estimate pipeline: {estimate_error}'})
+            if max_critical_path_minutes and estimate['critical_path_minutes'] > float(max_critical_path_minutes):
+                return jsonify({
+                    'success': False,
+                    'error': f'Estimated duration {estimate["critical_path_minutes"]} min exceeds limit of {max_critical_path_minutes} min',
+                    'estimate': estimate
+                })
+            if max_executor_minutes and estimate['executor_minutes'] > float(max_executor_minutes):
+                return jsonify({
+                    'success': False,
+                    'error': f'Estimated cost {estimate["executor_minutes"]} executor-min exceeds limit of {max_executor_minutes} executor-min',
+                    'estimate': estimate
+                })
+        
         # Prepare job data for pipeline creation - USE SCRIPT MODE
         job_data = {
             'name': job_name,
@@ -2754,6 +5104,7 @@ def create_pipeline_from_analysis():
         # Create the job
         try:
             jenkins_server.create_job(job_name, config_xml)
+            job_changed(job_name)
             print(f"[AI] Successfully created pipeline job: {job_name}")
 
             return jsonify({
@@ -2767,7 +5118,8 @@ def create_pipeline_from_analysis():
                 'explanation': analysis.get('explanation', ''),
                 'recommendations': analysis.get('recommendations', []),
                 'original_repository': repository_url,  # Keep reference to source repo
-                'branch': branch
+                'branch': branch,
+                'estimate': estimate
             })
 
         except Exception as e:
@@ -2787,6 +5139,36 @@ def create_pipeline_from_analysis():
         return jsonify({'success': False, 'error': f'Pipeline creation failed: {str(e)}'})
 
 
+@app.route('/api/ai/estimate-pipeline', methods=['POST'])
+def estimate_pipeline():
+    """Estimate critical-path duration and executor-minutes of a Jenkinsfile from similar jobs' history"""
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'No data provided'})
+
+        jenkinsfile = data.get('jenkinsfile') or data.get('analysis', {}).get('jenkinsfile', '')
+        if not jenkinsfile:
+            return jsonify({'success': False, 'error': 'Jenkinsfile is required'})
+
+        reference_jobs = data.get('reference_jobs') or None
+        if reference_jobs is not None and not (
+                isinstance(reference_jobs, list) and all(isinstance(name, str) for name in reference_jobs)):
+            return jsonify({'success': False, 'error': 'reference_jobs must be a list of job names'}), 400
+        estimate, error = estimate_pipeline_cost(jenkinsfile, reference_jobs)
+        if error:
+            return jsonify({'success': False, 'error': error})
+
+        return jsonify({'success': True, 'estimate': estimate})
+
+    except Exception as e:
+        print(f"Error in estimate_pipeline: {e}")
+        return jsonify({'success': False, 'error': f'Estimation failed: {str(e)}'})
+
+
 # NEW: Credentials API endpoint
 @app.route('/api/credentials')
 def get_credentials():
@@ -2814,53 +5196,52 @@ def index():
 
 @app.route('/api/jobs')
 def get_jobs():
-    """Get all Jenkins jobs with enhanced status information"""
+    """Get one page of jobs in a folder (top level by default), optionally with nested levels"""
     try:
         if jenkins_server:
-            jobs = jenkins_server.get_jobs()
-            jobs_with_type = []
-            for job in jobs:
-                try:
-                    job_info = jenkins_server.get_job_info(job['name'])
-                    job_class = job_info.get('_class', '')
-                    job_type = _detect_job_type(job_class)
-                    job_copy = dict(job)
-                    job_copy['job_type'] = job_type
-                    
-                    # Add last build status information
-                    if job_info.get('lastBuild'):
-                        try:
-                            last_build_info = jenkins_server.get_build_info(job['name'], job_info['lastBuild']['number'])
-                            job_copy['result'] = last_build_info.get('result')
-                            job_copy['building'] = last_build_info.get('building', False)
-                            job_copy['timestamp'] = last_build_info.get('timestamp')
-                            job_copy['duration'] = last_build_info.get('duration')
-                        except Exception as e:
-                            print(f"Error getting last build info for {job['name']}: {e}")
-                    
-                    jobs_with_type.append(job_copy)
-                except Exception as e:
-                    print(f"Error getting job info for {job['name']}: {e}")
-                    job_copy = dict(job)
-                    job_copy['job_type'] = 'unknown'
-                    jobs_with_type.append(job_copy)
-            return jsonify({'success': True, 'jobs': jobs_with_type})
+            folder = request.args.get('folder', '').strip('/')
+            depth = max(1, min(int(request.args.get('depth', 1)), JOBS_MAX_DEPTH))
+            limit = max(1, min(int(request.args.get('limit', JOBS_PAGE_SIZE)), JOBS_MAX_PAGE_SIZE))
+            cursor = request.args.get('cursor', '0')
+            cursor = int(cursor) if cursor.isdigit() else 0
+            
+            # Search, filters and sorting are answered from the in-memory index across all levels
+            query = request.args.get('q', '').strip()
+            job_type = request.args.get('type')
+            status = request.args.get('status')
+            sort = request.args.get('sort')
+            if query or job_type or status or sort:
+                sort = sort or 'name'
+                if sort.lstrip('-') not in JOB_SORT_FIELDS:
+                    return jsonify({'success': False, 'error': f'sort must be one of: {", ".join(JOB_SORT_FIELDS)} (prefix - for descending)'})
+                matches = job_search.search(query, job_type, status, folder, sort)
+                if matches is None:
+                    return jsonify({'success': False, 'error': 'Failed to load jobs'})
+                page = matches[cursor:cursor + limit]
+                next_cursor = str(cursor + limit) if cursor + limit < len(matches) else None
+                return jsonify({'success': True, 'jobs': page, 'total': len(matches), 'folder': folder, 'next_cursor': next_cursor})
+            
+            jobs, next_cursor = list_jobs(folder, depth, cursor, limit)
+            if jobs is None:
+                return jsonify({'success': False, 'error': f'Failed to load jobs{" in " + folder if folder else ""}'})
+            return jsonify({'success': True, 'jobs': jobs, 'folder': folder, 'next_cursor': next_cursor})
         else:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/job/<job_name>/config')
+@app.route('/api/job/<path:job_name>/config')
 def get_job_config(job_name):
     """Get job configuration for editing"""
     try:
         if not jenkins_server:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
         
-        # Get job info to determine job type
-        job_info = jenkins_server.get_job_info(job_name)
-        job_class = job_info.get('_class', '')
-        job_type = _detect_job_type(job_class)
+        # Look up the job type from the index
+        job_entry = job_index.get(job_name)
+        if job_entry is None:
+            return jsonify({'success': False, 'error': f'Job "{job_name}" not found'})
+        job_type = _detect_job_type(job_entry['_class'])
         
         # Get job configuration XML
         config_xml = jenkins_server.get_job_config(job_name)
@@ -2872,8 +5253,8 @@ def get_job_config(job_name):
         config_data.update({
             'name': job_name,
             'job_type': job_type,
-            'buildable': job_info.get('buildable', False),
-            'disabled': not job_info.get('buildable', True)
+            'buildable': job_entry['buildable'],
+            'disabled': not job_entry['buildable']
         })
         
         return jsonify({
@@ -2890,7 +5271,7 @@ def get_job_config(job_name):
         traceback.print_exc()
         return jsonify({'success': False, 'error': f'Failed to get job configuration: {str(e)}'})
 
-@app.route('/api/job/<job_name>/config/update', methods=['POST'])
+@app.route('/api/job/<path:job_name>/config/update', methods=['POST'])
 def update_job_config(job_name):
     """Update job configuration with enhanced error handling"""
     try:
@@ -2910,12 +5291,10 @@ def update_job_config(job_name):
         
         # Get current job type
         try:
-            job_info = jenkins_server.get_job_info(job_name)
-            job_class = job_info.get('_class', '')
-            job_type = _detect_job_type(job_class)
+            job_type = job_index.job_type(job_name)
+            if job_type is None:
+                return jsonify({'success': False, 'error': f'Job "{job_name}" not found'})
             print(f"[DEBUG] Job type: {job_type}")
-        except jenkins.NotFoundException:
-            return jsonify({'success': False, 'error': f'Job "{job_name}" not found'})
         except Exception as e:
             return jsonify({'success': False, 'error': f'Failed to get job info: {str(e)}'})
         
@@ -2954,6 +5333,7 @@ def update_job_config(job_name):
         # Update the job configuration
         try:
             jenkins_server.reconfig_job(job_name, config_xml)
+            job_changed(job_name)  # buildable may have changed
             print(f"[DEBUG] Successfully updated job: {job_name}")
             
             return jsonify({
@@ -3003,10 +5383,8 @@ def create_job():
         
         # Check if job already exists
         try:
-            jenkins_server.get_job_info(job_name)
-            return jsonify({'success': False, 'error': f'Job "{job_name}" already exists'})
-        except jenkins.NotFoundException:
-            pass
+            if job_index.get(job_name) is not None:
+                return jsonify({'success': False, 'error': f'Job "{job_name}" already exists'})
         except Exception as e:
             print(f"Error checking if job exists: {e}")
 
@@ -3064,6 +5442,7 @@ def create_job():
         # Try creating the job with python-jenkins first, then fallback to API
         try:
             jenkins_server.create_job(job_name, config_xml)
+            job_changed(job_name)
             print(f"[DEBUG] Successfully created job via python-jenkins: {job_name}")
             return jsonify({
                 'success': True,
@@ -3079,6 +5458,7 @@ def create_job():
             try:
                 api_success, api_message = create_job_via_api(job_name, config_xml)
                 if api_success:
+                    job_changed(job_name)
                     print(f"[DEBUG] Successfully created job via REST API: {job_name}")
                     return jsonify({
                         'success': True,
@@ -3142,7 +5522,7 @@ def install_plugins_for_job_type(job_type):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/jobs/<job_name>/delete', methods=['DELETE'])
+@app.route('/api/jobs/<path:job_name>/delete', methods=['DELETE'])
 def delete_job(job_name):
     """Delete a Jenkins job"""
     try:
@@ -3151,15 +5531,15 @@ def delete_job(job_name):
         
         # Check if job exists
         try:
-            jenkins_server.get_job_info(job_name)
-        except jenkins.NotFoundException:
-            return jsonify({'success': False, 'error': f'Job "{job_name}" does not exist'})
+            if job_index.get(job_name) is None:
+                return jsonify({'success': False, 'error': f'Job "{job_name}" does not exist'})
         except Exception as e:
             return jsonify({'success': False, 'error': f'Error checking job: {str(e)}'})
         
         # Delete the job
         try:
             jenkins_server.delete_job(job_name)
+            job_changed(job_name)
             print(f"[DEBUG] Successfully deleted job: {job_name}")
             return jsonify({
                 'success': True,
@@ -3173,12 +5553,55 @@ def delete_job(job_name):
         print(f"Unexpected error deleting job: {e}")
         return jsonify({'success': False, 'error': f'Unexpected error: {str(e)}'})
 
-@app.route('/api/job/<job_name>')
+@app.route('/api/jobs/build-batch', methods=['POST'])
+def build_jobs_batch():
+    """Trigger builds for a list of jobs, or one job across a parameter matrix, at a limited rate"""
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+        
+        data = request.get_json() or {}
+        base_parameters = data.get('parameters') or {}
+        if data.get('matrix'):
+            if not data.get('job'):
+                return jsonify({'success': False, 'error': 'A parameter matrix needs a job'})
+            # Size the matrix before expanding it; a few wide parameters multiply into millions
+            batch_size = _parameter_matrix_size(data['matrix'])
+            if batch_size > BUILD_BATCH_MAX:
+                return jsonify({'success': False, 'error': f'Batch of {batch_size} builds exceeds the limit of {BUILD_BATCH_MAX}'})
+            requests_to_submit = [(data['job'], parameters) for parameters in _expand_parameter_matrix(data['matrix'], base_parameters)]
+        else:
+            requests_to_submit = [(job_name, base_parameters) for job_name in data.get('jobs') or []]
+        
+        if not requests_to_submit:
+            return jsonify({'success': False, 'error': 'No jobs given'})
+        if len(requests_to_submit) > BUILD_BATCH_MAX:
+            return jsonify({'success': False, 'error': f'Batch of {len(requests_to_submit)} builds exceeds the limit of {BUILD_BATCH_MAX}'})
+        
+        rate = max(0.1, min(float(data.get('rate', BUILD_BATCH_RATE)), 50.0))
+        limiter = RateLimiter(rate)
+        with ThreadPoolExecutor(max_workers=BUILD_BATCH_WORKERS) as executor:
+            results = list(executor.map(lambda item: _submit_build(item[0], item[1], limiter), requests_to_submit))
+        
+        queued = sum(1 for result in results if result['success'])
+        return jsonify({
+            'success': True,
+            'results': results,
+            'queue_ids': [result['queue_id'] for result in results if result['success']],
+            'queued': queued,
+            'failed': len(results) - queued
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/job/<path:job_name>')
 def get_job_info(job_name):
-    """Get detailed information about a specific job"""
+    """Get detailed information about a specific job (fields= narrows the Jenkins tree query)"""
     try:
         if jenkins_server:
-            job_info = jenkins_server.get_job_info(job_name)
+            job_info = get_jenkins_json(_job_url_path(job_name), tree=requested_tree(JOB_INFO_FIELDS, required=('_class',)))
+            if job_info is None:
+                return jsonify({'success': False, 'error': f'Job {job_name} not found'})
             job_info["job_type"] = _detect_job_type(job_info.get("_class", ""))
             return jsonify({"success": True, "job_info": job_info})
         else:
@@ -3186,99 +5609,108 @@ def get_job_info(job_name):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route("/api/job/<job_name>/type")
+@app.route("/api/job/<path:job_name>/type")
 def get_job_type(job_name):
     """Return only the job type"""
     try:
         if not jenkins_server:
             return jsonify({"success": False, "error": "Jenkins server not connected"})
-        job_info = jenkins_server.get_job_info(job_name)
-        job_type = _detect_job_type(job_info.get("_class", ""))
+        job_type = job_index.job_type(job_name)
+        if job_type is None:
+            return jsonify({"success": False, "error": f'Job "{job_name}" not found'})
         return jsonify({"success": True, "job_type": job_type})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
-@app.route('/api/job/<job_name>/build', methods=['POST'])
+@app.route('/api/job/<path:job_name>/build', methods=['POST'])
 def build_job(job_name):
     """Trigger a build for a specific job"""
     try:
         if jenkins_server:
-            # Check if job is buildable
-            job_info = jenkins_server.get_job_info(job_name)
-            job_class = job_info.get('_class', '')
-            
-            # Some job types like folders and organization folders are not buildable
-            non_buildable_types = [
-                'com.cloudbees.hudson.plugins.folder.Folder',
-                'jenkins.branch.OrganizationFolder'
-            ]
-            
-            if job_class in non_buildable_types:
-                return jsonify({'success': False, 'error': f'Job type "{_detect_job_type(job_class)}" is not buildable'})
+            # Check if job is buildable (not a folder, not disabled)
+            error = job_index.build_error(job_name)
+            if error:
+                return jsonify({'success': False, 'error': error})
             
             parameters = request.json.get('parameters', {}) if request.json else {}
             if parameters:
-                jenkins_server.build_job(job_name, parameters=parameters)
+                queue_id = jenkins_server.build_job(job_name, parameters=parameters)
             else:
-                jenkins_server.build_job(job_name)
-            return jsonify({'success': True, 'message': f'Build triggered for {job_name}'})
+                queue_id = jenkins_server.build_job(job_name)
+            return jsonify({
+                'success': True,
+                'message': f'Build triggered for {job_name}',
+                'queue_id': queue_id,
+                'queue_url': f"{JENKINS_URL}/queue/item/{queue_id}/" if queue_id else None
+            })
         else:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/job/<job_name>/builds')
+@app.route('/api/job/<path:job_name>/builds')
 def get_job_builds(job_name):
-    """Get build history for a specific job with enhanced status information"""
+    """Get build history for a specific job from the local store, synced incrementally from Jenkins"""
     try:
         if jenkins_server:
-            job_info = jenkins_server.get_job_info(job_name)
-            builds = job_info.get('builds', [])
+            limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+            before = request.args.get('before')
             
-            # Enhance builds with detailed status information
-            enhanced_builds = []
-            for build in builds:
-                try:
-                    # Get detailed build info
-                    detailed_build = jenkins_server.get_build_info(job_name, build['number'])
-                    enhanced_build = {
-                        'number': detailed_build.get('number'),
-                        'url': detailed_build.get('url'),
-                        'timestamp': detailed_build.get('timestamp'),
-                        'duration': detailed_build.get('duration'),
-                        'result': detailed_build.get('result'),  # SUCCESS, FAILURE, UNSTABLE, ABORTED, etc.
-                        'building': detailed_build.get('building', False),
-                        'color': job_info.get('color'),  # Job overall color
-                        'displayName': detailed_build.get('displayName'),
-                        'id': detailed_build.get('id'),
-                        'keepLog': detailed_build.get('keepLog', False),
-                        'queueId': detailed_build.get('queueId')
-                    }
-                    enhanced_builds.append(enhanced_build)
-                except Exception as e:
-                    print(f"Error getting detailed build info for build {build['number']}: {e}")
-                    # Fallback to basic build info
-                    enhanced_builds.append(build)
+            if before and before.isdigit():
+                # Older pages come straight from the store
+                builds = build_history.get_builds(job_name, limit, int(before))
+            else:
+                live = sync_job_builds(job_name)
+                if live is None:
+                    return jsonify({'success': False, 'error': f'Could not load builds for {job_name}'})
+                
+                # In-progress builds are not stored yet; list them above the finished ones
+                stored = build_history.get_builds(job_name, limit)
+                builds = sorted(live['building'], key=lambda build: build['number'], reverse=True) + stored
+                for build in builds:
+                    build['color'] = live['color']  # Job overall color
             
-            return jsonify({'success': True, 'builds': enhanced_builds})
+            stored_builds = [build for build in builds if not build.get('building')]
+            next_cursor = str(stored_builds[-1]['number']) if len(stored_builds) >= limit else None
+            return jsonify({'success': True, 'builds': builds, 'next_cursor': next_cursor})
         else:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/job/<job_name>/build/<int:build_number>')
+@app.route('/api/job/<path:job_name>/stages')
+def get_job_stage_timings(job_name):
+    """Get per-stage duration percentiles across the last N Pipeline builds"""
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+        
+        max_builds = max(1, min(request.args.get('builds', 10, type=int), 100))
+        threshold = request.args.get('threshold', 0.2, type=float)
+        
+        timings = build_stage_timings(job_name, max_builds, threshold)
+        if not timings['builds']:
+            return jsonify({'success': False, 'error': f'No Pipeline stage data available for "{job_name}"'})
+        
+        return jsonify({'success': True, 'stage_timings': timings})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/job/<path:job_name>/build/<int:build_number>')
 def get_build_info(job_name, build_number):
-    """Get detailed information about a specific build"""
+    """Get detailed information about a specific build (fields= narrows the Jenkins tree query)"""
     try:
         if jenkins_server:
-            build_info = jenkins_server.get_build_info(job_name, build_number)
+            build_info = get_jenkins_json(f"{_job_url_path(job_name)}/{build_number}", tree=requested_tree(BUILD_INFO_FIELDS))
+            if build_info is None:
+                return jsonify({'success': False, 'error': f'Build {job_name} #{build_number} not found'})
             return jsonify({'success': True, 'build_info': build_info})
         else:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/job/<job_name>/build/<int:build_number>/console')
+@app.route('/api/job/<path:job_name>/build/<int:build_number>/console')
 def get_build_console(job_name, build_number):
     """Get console output for a specific build"""
     try:
@@ -3296,32 +5728,96 @@ def get_nodes():
     """Get all Jenkins nodes with detailed information"""
     try:
         if jenkins_server:
-            nodes = jenkins_server.get_nodes()
-            detailed_nodes = []
-            
-            for node in nodes:
-                try:
-                    node_info = jenkins_server.get_node_info(node['name'])
-                    node_copy = dict(node)
-                    node_copy.update({
-                        'executors': node_info.get('numExecutors', 0),
-                        'offline': node_info.get('offline', False),
-                        'offlineCause': node_info.get('offlineCause', None),
-                        'temporarilyOffline': node_info.get('temporarilyOffline', False),
-                        'monitorData': node_info.get('monitorData', {}),
-                        'loadStatistics': node_info.get('loadStatistics', {}),
-                    })
-                    detailed_nodes.append(node_copy)
-                except Exception as e:
-                    print(f"Error getting node info for {node['name']}: {e}")
-                    detailed_nodes.append(node)
-            
-            return jsonify({'success': True, 'nodes': detailed_nodes})
+            nodes = get_all_nodes()
+            if nodes is None:
+                return jsonify({'success': False, 'error': 'Failed to load nodes from Jenkins'})
+            return jsonify({'success': True, 'nodes': nodes})
         else:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/nodes/utilization')
+def get_node_utilization():
+    """Get executor utilization percentiles per label and per-node capacity series"""
+    try:
+        if jenkins_server:
+            node_monitor.start()
+        window_minutes = max(1, min(int(request.args.get('window', 60)), 24 * 60))
+        return jsonify({'success': True, 'utilization': node_monitor.utilization(window_minutes)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/capacity/advisor')
+def get_capacity_advice():
+    """Recommend executor counts per label pool from the queue, nodes and build durations"""
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+        
+        target_minutes = max(1.0, float(request.args.get('target_minutes', 15)))
+        window_minutes = max(1, min(int(request.args.get('window', 60)), 24 * 60))
+        advice, error = advise_capacity(target_minutes, window_minutes)
+        if error:
+            return jsonify({'success': False, 'error': error})
+        return jsonify({'success': True, 'advice': advice})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/nodes/batch', methods=['POST'])
+def batch_node_action():
+    """Take many nodes offline/online, delete or drain them concurrently
+    
+    Drains return at once with a drain_id; poll /api/nodes/drain/<id> for progress.
+    """
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+        
+        data = request.get_json() or {}
+        action = data.get('action')
+        node_names = list(dict.fromkeys(data.get('nodes') or []))
+        if action not in NODE_BATCH_ACTIONS:
+            return jsonify({'success': False, 'error': f'action must be one of: {", ".join(NODE_BATCH_ACTIONS)}'})
+        if not node_names:
+            return jsonify({'success': False, 'error': 'No nodes given'})
+        message = data.get('message') or 'Taken offline via dashboard'
+        
+        # One snapshot of every node decides which ones actually need toggling
+        nodes = get_all_nodes()
+        if nodes is None:
+            return jsonify({'success': False, 'error': 'Could not read nodes from Jenkins'})
+        nodes_by_name = {node['name']: node for node in nodes}
+        
+        with ThreadPoolExecutor(max_workers=NODE_BATCH_WORKERS) as executor:
+            results = list(executor.map(
+                lambda name: _apply_node_action(name, nodes_by_name.get(name), action, message), node_names))
+        
+        succeeded = sum(1 for result in results if result['success'])
+        response = {
+            'success': True,
+            'action': action,
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        }
+        
+        # Draining: nodes are offline so no new builds start; a background watcher waits for running ones
+        if action == 'drain':
+            timeout_seconds = max(0, min(int(data.get('timeout', 600)), NODE_DRAIN_MAX_TIMEOUT))
+            response['drain_id'] = node_drains.add([result['node'] for result in results if result['success']], timeout_seconds)
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Unexpected error: {str(e)}'})
+
+@app.route('/api/nodes/drain/<drain_id>')
+def get_node_drain(drain_id):
+    """Progress of a drain started by /api/nodes/batch"""
+    drain = node_drains.get(drain_id)
+    if drain is None:
+        return jsonify({'success': False, 'error': f'Unknown drain id {drain_id}'})
+    return jsonify({'success': True, 'drain': drain})
+
 @app.route('/api/nodes/<node_name>/toggle', methods=['POST'])
 def toggle_node(node_name):
     """Toggle node online/offline status"""
@@ -3404,6 +5900,95 @@ def get_queue():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/queue/analytics')
+def get_queue_analytics():
+    """Get queue wait-time distributions per label/job, depth trend and long-wait alerts"""
+    try:
+        if jenkins_server:
+            queue_monitor.start()
+        window_minutes = max(1, min(int(request.args.get('window', 60)), 24 * 60))
+        return jsonify({'success': True, 'analytics': queue_monitor.snapshot(window_minutes)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+def _cancel_queue_item(item):
+    """Cancel one queue item and report the outcome instead of raising"""
+    try:
+        jenkins_server.cancel_queue(item['id'])
+        return {'id': item['id'], 'job': item['job'], 'success': True}
+    except Exception as e:
+        return {'id': item['id'], 'job': item['job'], 'success': False, 'error': str(e)}
+
+@app.route('/api/queue/cancel', methods=['POST'])
+def cancel_queue_items():
+    """Cancel every queued item matching job regex, label, minimum age and why substring filters"""
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+        
+        data = request.get_json() or {}
+        job_pattern = data.get('job')
+        label = data.get('label')
+        min_age_seconds = data.get('min_age_seconds')
+        why_text = data.get('why')
+        if not any(value not in (None, '') for value in (job_pattern, label, min_age_seconds, why_text)) and not data.get('all'):
+            return jsonify({'success': False, 'error': 'Give at least one filter (job, label, min_age_seconds, why) or all=true'})
+        try:
+            job_regex = re.compile(job_pattern) if job_pattern else None
+        except re.error as e:
+            return jsonify({'success': False, 'error': f'Invalid job regex: {e}'})
+        
+        # Resolve all filters against a single snapshot of the queue
+        queue_data = get_jenkins_json('queue', tree='items[id,inQueueSince,why,task[name,url]]')
+        if queue_data is None:
+            return jsonify({'success': False, 'error': 'Failed to load queue from Jenkins'})
+        now_ms = int(time.time() * 1000)
+        matches = []
+        for item in queue_data.get('items', []):
+            task = item.get('task') or {}
+            job = _job_name_from_url(task.get('url')) or task.get('name', '')
+            why = item.get('why') or ''
+            if job_regex and not (job_regex.search(job) or job_regex.search(task.get('name', ''))):
+                continue
+            if label and _queue_item_label(why) != label:
+                continue
+            if min_age_seconds and now_ms - (item.get('inQueueSince') or now_ms) < float(min_age_seconds) * 1000:
+                continue
+            if why_text and why_text.lower() not in why.lower():
+                continue
+            matches.append({'id': item.get('id'), 'job': job, 'why': why})
+        
+        if data.get('dry_run'):
+            return jsonify({'success': True, 'dry_run': True, 'matched': len(matches), 'items': matches})
+        
+        with ThreadPoolExecutor(max_workers=QUEUE_CANCEL_WORKERS) as executor:
+            results = list(executor.map(_cancel_queue_item, matches))
+        failures = [result for result in results if not result['success']]
+        return jsonify({
+            'success': True,
+            'matched': len(matches),
+            'cancelled': len(results) - len(failures),
+            'failed': len(failures),
+            'failures': failures
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Unexpected error: {str(e)}'})
+
+@app.route('/api/queue/<int:queue_id>/wait')
+def wait_for_queue_item(queue_id):
+    """Long-poll until a queued item gets a build number (or is cancelled)"""
+    try:
+        if not jenkins_server:
+            return jsonify({'success': False, 'error': 'Jenkins server not connected'})
+        
+        timeout_seconds = max(0.0, min(float(request.args.get('timeout', 25)), QUEUE_WAIT_MAX_TIMEOUT))
+        state = queue_watcher.wait(queue_id, timeout_seconds)
+        if state is None:
+            return jsonify({'success': True, 'queue_id': queue_id, 'status': 'waiting', 'why': queue_watcher.reason(queue_id)})
+        return jsonify(dict(state, success=True, queue_id=queue_id))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/queue/<int:queue_id>/cancel', methods=['POST'])
 def cancel_queue_item(queue_id):
     """Cancel a queued build"""
@@ -3446,12 +6031,140 @@ def get_statistics():
                 'jenkins_version': info.get('version', 'Unknown'),
                 'uptime': info.get('upTime', 0)
             }
+            stats.update(build_history.summary(int(time.time() * 1000) - DAY_MS))
             return jsonify({'success': True, 'statistics': stats})
         else:
             return jsonify({'success': False, 'error': 'Jenkins server not connected'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/health')
+def get_health():
+    """Connection and circuit-breaker state of the Jenkins client and the AI service (never blocks on Jenkins)"""
+    return jsonify({
+        'success': True,
+        'jenkins': jenkins_server.health(),
+        'ai': {'configured': bool(GEMINI_API_KEY), 'loaded': genai is not None}
+    })
+
+# Federation API Routes
+@app.route('/api/federation/controllers')
+def get_federation_controllers():
+    """Registered controllers with circuit state and last latency (no Jenkins calls)"""
+    return jsonify({'success': True, 'controllers': [controller.status() for controller in controllers.values()]})
+
+@app.route('/api/federation/jobs')
+def get_federation_jobs():
+    """Top-level jobs of every controller, merged and sorted by name"""
+    try:
+        results, status = federate(_controller_jobs)
+        jobs = sorted(itertools.chain.from_iterable(results.values()), key=lambda job: (job['name'].lower(), job['controller']))
+        return jsonify({'success': True, 'jobs': jobs, 'controllers': status})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/federation/queue')
+def get_federation_queue():
+    """Queue items of every controller, oldest first"""
+    try:
+        results, status = federate(_controller_queue)
+        queue = sorted(itertools.chain.from_iterable(results.values()), key=lambda item: item.get('inQueueSince', 0))
+        return jsonify({'success': True, 'queue': queue, 'controllers': status})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/federation/nodes')
+def get_federation_nodes():
+    """Nodes of every controller"""
+    try:
+        results, status = federate(_controller_nodes)
+        nodes = list(itertools.chain.from_iterable(results.values()))
+        return jsonify({'success': True, 'nodes': nodes, 'controllers': status})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/federation/statistics')
+def get_federation_statistics():
+    """Job/node/executor/queue counts per controller and in total"""
+    try:
+        results, status = federate(_controller_statistics)
+        totals = defaultdict(int)
+        for entry in status:
+            stats = results.get(entry['name'])
+            if stats:
+                entry['statistics'] = stats
+                for key, value in stats.items():
+                    totals[key] += value
+        return jsonify({'success': True, 'statistics': dict(totals), 'controllers': status})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+def _metric_counters():
+    """Totals kept outside the metrics registry, read at scrape time"""
+    return [('jenkins_ui_circuit_rejected_calls_total', (('controller', controller.name),), controller.breaker.status()['rejected_calls'])
+            for controller in controllers.values()]
+
+def _metric_gauges():
+    """Point-in-time values read at scrape time: hit ratios, queue and executor counts, circuit state"""
+    gauges = [('jenkins_ui_cache_hit_ratio', (('cache', cache),), ratio)
+              for cache, ratio in sorted(metrics.cache_hit_ratios().items())]
+    
+    with queue_monitor.lock:
+        waiting = list(queue_monitor.items.values())
+        depth = queue_monitor.depth[-1] if queue_monitor.depth else None
+    if depth is not None:
+        for state, value in zip(('total', 'blocked', 'stuck', 'buildable'), depth[1:5]):
+            gauges.append(('jenkins_ui_queue_depth', (('state', state),), value))
+        by_label = defaultdict(int)
+        for item in waiting:
+            by_label[item['label'] or ADVISOR_ANY_LABEL] += 1
+        gauges.extend(('jenkins_ui_queue_items', (('label', label),), count) for label, count in sorted(by_label.items()))
+    
+    with node_monitor.lock:
+        latest = node_monitor.samples[-1][1] if node_monitor.samples else None
+    if latest is not None:
+        online = [node for node in latest.values() if not node[2]]
+        gauges.append(('jenkins_ui_executors', (('state', 'busy'),), sum(node[0] for node in online)))
+        gauges.append(('jenkins_ui_executors', (('state', 'total'),), sum(node[1] for node in online)))
+    
+    for controller in controllers.values():
+        circuit = controller.breaker.status()
+        labels = (('controller', controller.name),)
+        gauges.append(('jenkins_ui_circuit_state', labels, CIRCUIT_STATE_VALUES[circuit['state']]))
+    gauges.append(('jenkins_ui_snapshot_entries', (), len(jenkins_snapshots.entries)))
+    return gauges
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics: route latency, outbound calls, cache hit ratios, queue depths and circuit state"""
+    return app.response_class(metrics.render(_metric_gauges(), _metric_counters()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/analytics/regressions')
+def get_duration_regressions():
+    """Get jobs whose recent build durations regressed against their baseline"""
+    try:
+        threshold = float(request.args.get('threshold', REGRESSION_THRESHOLD))
+        recent_days = float(request.args.get('recent_days', 7))
+        baseline_days = float(request.args.get('baseline_days', 28))
+        
+        # Pull new builds first unless the caller only wants what is already stored
+        synced_jobs = None
+        if jenkins_server and request.args.get('refresh', 'true').lower() != 'false':
+            synced_jobs = build_sync.sync(BUILD_SYNC_MIN_AGE)
+        
+        regressions, jobs_analyzed = detect_duration_regressions(threshold, recent_days, baseline_days)
+        return jsonify({
+            'success': True,
+            'regressions': regressions,
+            'jobs_analyzed': jobs_analyzed,
+            'synced_jobs': synced_jobs,
+            'threshold': threshold,
+            'recent_days': recent_days,
+            'baseline_days': baseline_days
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/git/repositories')
 def get_git_repositories():
     """Get Git repositories (mock implementation)"""
@@ -3477,4 +6190,5 @@ def get_git_repositories():
         return jsonify({'success': False, 'error': str(e)})
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true', host='0.0.0.0', port=5000)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization and compression for the largest API responses
+"""
+
+import sys
+import json
+import gzip
+import time
+import random
+import argparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import requests
+
+# Endpoints whose payloads grow with the size of the Jenkins instance
+ENDPOINTS = ['/api/plugins', '/api/jobs?limit=500', '/api/nodes', '/api/queue/analytics']
+
+def synthetic_plugins(count=250):
+    """Payload shaped like get_plugins_info()"""
+    plugins = []
+    for i in range(count):
+        plugins.append({
+            'active': True, 'backupVersion': None, 'bundled': False, 'deleted': False,
+            'dependencies': [
+                {'name': f'dependency-{j}', 'optional': j % 3 == 0, 'version': f'{j}.{i % 10}'}
+                for j in range(random.randint(0, 8))
+            ],
+            'downgradable': False, 'enabled': True, 'hasUpdate': i % 7 == 0,
+            'longName': f'Example Plugin {i}', 'pinned': False,
+            'requiredCoreVersion': '2.401.3', 'shortName': f'example-plugin-{i}',
+            'supportsDynamicLoad': 'MAYBE', 'url': f'https://plugins.jenkins.io/example-plugin-{i}',
+            'version': f'{i % 5}.{i % 13}.{i}'
+        })
+    return {'success': True, 'plugins': plugins}
+
+def synthetic_jobs(count=500):
+    """Payload shaped like one /api/jobs page"""
+    now = int(time.time() * 1000)
+    jobs = []
+    for i in range(count):
+        jobs.append({
+            'name': f'team-{i % 12}/service-{i}', 'short_name': f'service-{i}',
+            'job_type': random.choice(['pipeline', 'freestyle', 'multibranch']),
+            'color': random.choice(['blue', 'red', 'blue_anime', 'notbuilt']),
+            'description': f'Build and deploy pipeline for service {i}',
+            'result': random.choice(['SUCCESS', 'FAILURE', None]), 'building': i % 20 == 0,
+            'timestamp': now - random.randint(0, 86400000), 'duration': random.randint(10000, 900000),
+            'has_children': False
+        })
+    return {'success': True, 'jobs': jobs, 'next_cursor': str(count)}
+
+def synthetic_nodes(count=100):
+    """Payload shaped like /api/nodes"""
+    nodes = []
+    for i in range(count):
+        busy = random.randint(0, 4)
+        nodes.append({
+            'name': f'agent-{i}', 'displayName': f'agent-{i}', 'executors': 4,
+            'busyExecutors': busy, 'idleExecutors': 4 - busy, 'offline': i % 15 == 0,
+            'offlineCause': None, 'labels': ['linux', 'docker', f'pool-{i % 5}'],
+            'monitorData': {
+                'hudson.node_monitors.DiskSpaceMonitor': {'size': random.randint(10 ** 9, 10 ** 11)},
+                'hudson.node_monitors.SwapSpaceMonitor': {'availableSwapSpace': random.randint(0, 10 ** 9)},
+                'hudson.node_monitors.ResponseTimeMonitor': {'average': random.randint(1, 200)}
+            },
+            'diskFreeBytes': random.randint(10 ** 9, 10 ** 11),
+            'swapFreeBytes': random.randint(0, 10 ** 9), 'responseTimeMs': random.randint(1, 200)
+        })
+    return {'success': True, 'nodes': nodes}
+
+def live_payloads(base_url):
+    """Fetch the real payloads from a running instance"""
+    payloads = {}
+    for endpoint in ENDPOINTS:
+        response = requests.get(base_url.rstrip('/') + endpoint,
+                                headers={'Accept-Encoding': 'identity'}, timeout=60)
+        payloads[endpoint] = response.json()
+    return payloads
+
+def stdlib_dumps(obj):
+    # Same arguments Flask's default provider uses for compact responses
+    return json.dumps(obj, sort_keys=True, ensure_ascii=True, separators=(',', ':')).encode()
+
+def orjson_dumps(obj):
+    return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+def time_call(func, obj, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(obj)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--url', help='Benchmark live payloads from a running instance, e.g. http://localhost:5000')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    random.seed(42)
+    if args.url:
+        payloads = live_payloads(args.url)
+    else:
+        payloads = {
+            '/api/plugins (250 plugins)': synthetic_plugins(),
+            '/api/jobs (500 jobs)': synthetic_jobs(),
+            '/api/nodes (100 nodes)': synthetic_nodes()
+        }
+
+    encoders = [('stdlib', stdlib_dumps)]
+    if orjson:
+        encoders.append(('orjson', orjson_dumps))
+    else:
+        print("orjson is not installed; only the stdlib encoder is measured")
+
+    print(f"{'endpoint':<30} {'encoder':<8} {'ms':>8} {'bytes':>10} {'gzip':>9} {'br':>9}")
+    print("-" * 78)
+    for name, payload in payloads.items():
+        for encoder_name, encoder in encoders:
+            body = encoder(payload)
+            elapsed = time_call(encoder, payload, args.repeat)
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            brotlied = len(brotli.compress(body, quality=5)) if brotli else '-'
+            print(f"{name:<30} {encoder_name:<8} {elapsed:>8.2f} {len(body):>10} {gzipped:>9} {brotlied:>9}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark request throughput under the development server and gunicorn against a stub Jenkins
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+SERVERS = ('dev-debug', 'dev', 'gunicorn')
+
+# Enough agents that /api/nodes does some real work per request
+STUB_NODES = {'computer': [
+    {'displayName': f'agent-{i}', 'description': '', 'numExecutors': 4, 'offline': False,
+     'temporarilyOffline': False, 'executors': [{'idle': True}] * 4,
+     'assignedLabels': [{'name': 'linux'}], 'monitorData': {}}
+    for i in range(20)
+]}
+
+class StubJenkins(BaseHTTPRequestHandler):
+    """Answers the Jenkins JSON API calls the app makes, each after a fixed latency"""
+    protocol_version = 'HTTP/1.1'
+    latency = 0.05
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.path.startswith('/computer'):
+            body = STUB_NODES
+        elif self.path.startswith('/queue'):
+            body = {'items': []}
+        elif self.path.startswith('/crumbIssuer'):
+            body = {'crumb': 'stub', 'crumbRequestField': 'Jenkins-Crumb'}
+        else:
+            body = {'mode': 'NORMAL', 'jobs': [], 'plugins': []}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Jenkins', '2.440')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # The load generator hung up at the end of a run
+
+def start_stub(port, latency):
+    StubJenkins.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubJenkins)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_app(kind, port, env):
+    """Start the app in its own process; dev-debug enables the debugger (without the reloader)"""
+    if kind == 'gunicorn':
+        command = ['gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    else:
+        debug = kind == 'dev-debug'
+        command = [sys.executable, '-c',
+                   f"from app import app; app.run(host='127.0.0.1', port={port}, debug={debug}, use_reloader=False)"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+def wait_until_up(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=5)
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    return False
+
+def run_load(url, clients, duration):
+    """Closed-loop load: each client sends its next request as soon as the previous one returns"""
+    latencies, errors = [], [0]
+    stop_at = time.time() + duration
+
+    def client():
+        session = requests.Session()
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.get(url, headers={'Accept-Encoding': 'gzip'}, timeout=30)
+                ok = response.status_code == 200 and response.json().get('success')
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    if not latencies:
+        return 0.0, None, None, errors[0]
+    return (len(latencies) / duration, latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.95)] * 1000, errors[0])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--servers', default=','.join(SERVERS), help=f'Comma-separated subset of: {", ".join(SERVERS)}')
+    parser.add_argument('--path', default='/api/nodes', help='Endpoint to load')
+    parser.add_argument('--clients', type=int, nargs='+', default=[16, 64], help='Concurrent clients per run')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub Jenkins response time in seconds')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the app under test')
+    parser.add_argument('--stub-port', type=int, default=8765, help='Port for the stub Jenkins')
+    args = parser.parse_args()
+
+    start_stub(args.stub_port, args.latency)
+    history_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    env = dict(os.environ,
+               JENKINS_URL=f'http://127.0.0.1:{args.stub_port}',
+               BUILD_HISTORY_DB=history_db,
+               HOST='127.0.0.1',
+               PORT=str(args.port),
+               GUNICORN_ACCESS_LOG='')
+    url = f'http://127.0.0.1:{args.port}{args.path}'
+
+    print(f"{args.path}, stub Jenkins latency {args.latency * 1000:.0f} ms, {args.duration:g} s per run")
+    print(f"{'server':<10} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    print("-" * 53)
+    try:
+        for kind in args.servers.split(','):
+            process = start_app(kind, args.port, env)
+            try:
+                if not wait_until_up(url):
+                    print(f"{kind:<10} did not start")
+                    continue
+                for clients in args.clients:
+                    rate, p50, p95, errors = run_load(url, clients, args.duration)
+                    p50 = f"{p50:.0f}" if p50 is not None else '-'
+                    p95 = f"{p95:.0f}" if p95 is not None else '-'
+                    print(f"{kind:<10} {clients:>7} {rate:>8.1f} {p50:>8} {p95:>8} {errors:>7}")
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        os.unlink(history_db)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
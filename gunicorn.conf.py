@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for running Jenkins UI in production:
+
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5000)}"
+
+# The queue/node samplers, job indexes and caches live in the worker process, so
+# one worker with many threads is the default; extra workers each run their own
+# samplers and multiply the polling load on Jenkins.
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+# gthread: one thread per in-flight request. Long-polls (/api/queue/<id>/wait)
+# and AI analysis hold a thread for their whole duration, so size
+# GUNICORN_THREADS for the concurrent long-lived requests plus normal traffic.
+# gevent (pip install gevent) serves them as greenlets instead of threads.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# A worker that stops heartbeating this long is restarted. gthread and gevent
+# workers heartbeat while requests run, so this does not cut off long-polls.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None   # set empty to disable
+errorlog = '-'
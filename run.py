@@ -97,12 +97,13 @@ def main():
     print("Press Ctrl+C to stop the server")
     print("-" * 40)
     
-    # Import and run the Flask app
+    # Import and run the Flask app on the development server
+    # (production: gunicorn -c gunicorn.conf.py app:app)
     from app import app
     
     host = os.getenv('HOST', '0.0.0.0')
     port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
     app.run(host=host, port=port, debug=debug)
 
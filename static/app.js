@@ -238,12 +238,12 @@ function getJobTypeIcon(jobType) {
 // Dashboard functions
 function loadDashboard() {
     loadStatistics();
+    loadFederationOverview();
     loadRecentJobs();
 }
 
 function loadStatistics() {
-    fetch('/api/statistics')
-        .then(response => response.json())
+    fetchJson('/api/statistics')
         .then(data => {
             if (data.success) {
                 const stats = data.statistics;
@@ -261,9 +261,104 @@ function loadStatistics() {
         });
 }
 
+function loadFederationOverview() {
+    fetchJson('/api/federation/statistics')
+        .then(data => {
+            if (data.success) {
+                displayFederationOverview(data.controllers, data.statistics);
+            } else {
+                console.error('Failed to load controllers:', data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading controllers:', error);
+        });
+}
+
+// Federation: with more than one controller configured, the jobs, queue and nodes views list
+// every controller; only items of the primary (JENKINS_URL) controller get actions
+let federation = { enabled: false, primary: null, urls: {} };
+let federationLoaded = null;
+
+function loadFederationControllers() {
+    if (!federationLoaded) {
+        federationLoaded = fetchJson('/api/federation/controllers')
+            .then(data => {
+                if (data.success && data.controllers.length > 1) {
+                    federation = {
+                        enabled: true,
+                        primary: data.controllers[0].name,
+                        urls: Object.fromEntries(data.controllers.map(controller => [controller.name, controller.url]))
+                    };
+                }
+            })
+            .catch(error => {
+                console.error('Error loading controllers:', error);
+                federationLoaded = null;
+            });
+    }
+    return federationLoaded;
+}
+
+function isRemoteItem(item) {
+    return federation.enabled && item.controller && item.controller !== federation.primary;
+}
+
+function getControllerBadge(item) {
+    return federation.enabled && item.controller ? `<span class="job-type-badge controller">🌐 ${item.controller}</span>` : '';
+}
+
+function getUnavailableControllers(controllers) {
+    return (controllers || [])
+        .filter(controller => !controller.success)
+        .map(controller => `<p class="federation-warning">⚠️ ${controller.name}: ${controller.error}</p>`)
+        .join('');
+}
+
+function displayFederationOverview(controllers, totals) {
+    const container = document.getElementById('federation-overview');
+    if (!container) return;
+    
+    // Only worth showing when more than one controller is configured
+    if (controllers.length < 2) {
+        container.innerHTML = '';
+        return;
+    }
+    
+    container.innerHTML = `
+        <div class="job-detail-content" style="margin-bottom: 2rem;">
+            <h3>🌐 Controllers</h3>
+            <table class="detail-table">
+                <tr><td><strong>Controller</strong></td><td><strong>Status</strong></td><td><strong>Jobs</strong></td><td><strong>Nodes</strong></td><td><strong>Executors</strong></td><td><strong>Queue</strong></td><td><strong>Latency</strong></td></tr>
+                ${controllers.map(controller => {
+                    const stats = controller.statistics;
+                    return `
+                        <tr>
+                            <td>${controller.name}</td>
+                            <td><span class="status ${controller.success ? 'status-success' : 'status-failure'}" title="${controller.error || ''}">${controller.success ? 'OK' : 'Unavailable'}</span></td>
+                            <td>${stats ? stats.total_jobs : '-'}</td>
+                            <td>${stats ? `${stats.online_nodes}/${stats.total_nodes}` : '-'}</td>
+                            <td>${stats ? `${stats.busy_executors}/${stats.executors}` : '-'}</td>
+                            <td>${stats ? stats.queue_size : '-'}</td>
+                            <td>${controller.latency_ms != null ? Math.round(controller.latency_ms) + ' ms' : '-'}</td>
+                        </tr>
+                    `;
+                }).join('')}
+                <tr>
+                    <td><strong>Total</strong></td><td></td>
+                    <td><strong>${totals.total_jobs || 0}</strong></td>
+                    <td><strong>${totals.online_nodes || 0}/${totals.total_nodes || 0}</strong></td>
+                    <td><strong>${totals.busy_executors || 0}/${totals.executors || 0}</strong></td>
+                    <td><strong>${totals.queue_size || 0}</strong></td>
+                    <td></td>
+                </tr>
+            </table>
+        </div>
+    `;
+}
+
 function loadRecentJobs() {
-    fetch('/api/jobs')
-        .then(response => response.json())
+    fetchJson('/api/jobs')
         .then(data => {
             if (data.success) {
                 displayRecentJobs(data.jobs.slice(0, 5));
@@ -308,12 +403,215 @@ function displayRecentJobs(jobs) {
 }
 
 // Jobs functions - COLUMN LAYOUT
+// Small fetch layer: concurrent GETs of the same URL share one request. Responses of the
+// endpoints listed here are kept for their TTL and revalidated with If-None-Match once it
+// expires; anything else (console output, build history pages, ...) is never stored
+const API_CACHE_TTL = {
+    '/api/statistics': 10000,
+    '/api/federation/statistics': 10000,
+    '/api/federation/controllers': 60000,
+    '/api/federation/jobs': 15000,
+    '/api/federation/nodes': 10000,
+    '/api/federation/queue': 5000,
+    '/api/jobs': 15000,
+    '/api/nodes': 10000,
+    '/api/queue': 5000,
+    '/api/plugins': 300000,
+    '/api/credentials': 60000
+};
+const API_CACHE_MAX_ENTRIES = 100;   // Query strings (searches, folders, pages) each get an entry
+const apiCache = new Map();            // Insertion order doubles as least-recently-used order
+const apiInFlight = new Map();
+
+function fetchJson(url) {
+    const cached = apiCache.get(url);
+    const ttl = API_CACHE_TTL[url.split('?')[0]];
+    if (cached && Date.now() - cached.time < ttl) {
+        apiCache.delete(url);
+        apiCache.set(url, cached);
+        return Promise.resolve(cached.data);
+    }
+    if (apiInFlight.has(url)) {
+        return apiInFlight.get(url);
+    }
+    
+    const headers = { 'Accept': 'application/json' };
+    if (cached && cached.etag) {
+        headers['If-None-Match'] = cached.etag;
+    }
+    const request = fetch(url, { headers: headers })
+        .then(response => {
+            if (response.status === 304 && cached) {
+                cached.time = Date.now();
+                return cached.data;
+            }
+            const etag = response.headers.get('ETag');
+            return response.json().then(data => {
+                if (ttl && data.success !== false) {
+                    apiCache.delete(url);
+                    apiCache.set(url, { data: data, etag: etag, time: Date.now() });
+                    if (apiCache.size > API_CACHE_MAX_ENTRIES) {
+                        apiCache.delete(apiCache.keys().next().value);
+                    }
+                }
+                return data;
+            });
+        })
+        .finally(() => {
+            apiInFlight.delete(url);
+        });
+    apiInFlight.set(url, request);
+    return request;
+}
+
+function invalidateApiCache(url) {
+    apiCache.delete(url);
+}
+
+// Requests that change state go through here so cached reads are dropped afterwards
+function apiFetch(url, options = {}) {
+    return fetch(url, options).then(response => {
+        apiCache.clear();
+        return response;
+    });
+}
+
+// Windowed list renderer: only rows in or near the viewport exist in the DOM,
+// and the same row elements are reused as the list scrolls
+class VirtualList {
+    constructor(container, renderRow, options = {}) {
+        this.container = container;
+        this.renderRow = renderRow;
+        this.gap = options.gap || 0;
+        this.overscan = options.overscan || 4;
+        this.fallbackRowHeight = options.rowHeight || 120;
+        this.onNearEnd = options.onNearEnd || null;
+        this.items = [];
+        this.pool = [];
+        this.rowHeight = 0;
+        this.frame = null;
+        
+        container.innerHTML = '';
+        container.classList.add('virtual-list');
+        this.spacer = document.createElement('div');
+        container.appendChild(this.spacer);
+        this.onScroll = () => this.scheduleRender();
+        container.addEventListener('scroll', this.onScroll);
+        // Re-render when the list becomes visible or is resized
+        this.observer = window.ResizeObserver ? new ResizeObserver(this.onScroll) : null;
+        if (this.observer) this.observer.observe(container);
+    }
+    
+    destroy() {
+        this.container.removeEventListener('scroll', this.onScroll);
+        if (this.observer) this.observer.disconnect();
+        if (this.frame) cancelAnimationFrame(this.frame);
+        this.container.classList.remove('virtual-list');
+        this.container.innerHTML = '';
+    }
+    
+    setItems(items) {
+        this.items = items;
+        this.pool.forEach(row => { row.item = undefined; });
+        this.render();
+    }
+    
+    measureRowHeight() {
+        if (this.rowHeight || this.items.length === 0 || this.container.clientWidth === 0) return;
+        const probe = document.createElement('div');
+        probe.className = 'virtual-row';
+        probe.style.visibility = 'hidden';
+        probe.innerHTML = this.renderRow(this.items[0], 0);
+        this.container.appendChild(probe);
+        this.rowHeight = probe.offsetHeight;
+        probe.remove();
+    }
+    
+    scheduleRender() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+    
+    render() {
+        this.measureRowHeight();
+        const rowHeight = this.rowHeight || this.fallbackRowHeight;
+        const stride = rowHeight + this.gap;
+        const viewport = this.container.clientHeight || stride * 10;
+        this.spacer.style.height = `${Math.max(0, this.items.length * stride - this.gap)}px`;
+        
+        const first = Math.max(0, Math.floor(this.container.scrollTop / stride) - this.overscan);
+        const last = Math.min(this.items.length, Math.ceil((this.container.scrollTop + viewport) / stride) + this.overscan);
+        
+        while (this.pool.length < last - first) {
+            const row = document.createElement('div');
+            row.className = 'virtual-row';
+            this.container.appendChild(row);
+            this.pool.push(row);
+        }
+        
+        this.pool.forEach((row, offset) => {
+            const index = first + offset;
+            if (index >= last) {
+                row.style.display = 'none';
+                return;
+            }
+            row.style.display = '';
+            row.style.height = `${rowHeight}px`;
+            row.style.transform = `translateY(${index * stride}px)`;
+            // Only rebuild a row's content when it now shows a different item
+            if (row.item !== this.items[index]) {
+                row.item = this.items[index];
+                row.innerHTML = this.renderRow(this.items[index], index);
+            }
+        });
+        
+        if (this.onNearEnd && last >= this.items.length - this.overscan) {
+            this.onNearEnd();
+        }
+    }
+}
+
+// Reuse the virtual list already attached to a container, or attach a new one
+function virtualListFor(container, renderRow, options = {}) {
+    if (!container.virtualList) {
+        container.virtualList = new VirtualList(container, renderRow, options);
+    }
+    return container.virtualList;
+}
+
+function clearVirtualList(container) {
+    if (container.virtualList) {
+        container.virtualList.destroy();
+        container.virtualList = null;
+    }
+}
+
+// Jobs view: folders expand in place, so the list is a flat array of rows with a depth
+let jobsNextCursor = null;
+let jobsQuery = '';
+let jobSearchTimer = null;
+let jobsLoadingMore = false;
+let jobRows = [];
+const expandedFolders = new Set();
+
+function jobsUrl(cursor = null) {
+    const params = new URLSearchParams();
+    if (jobsQuery) params.set('q', jobsQuery);
+    if (cursor) params.set('cursor', cursor);
+    const queryString = params.toString();
+    return queryString ? `/api/jobs?${queryString}` : '/api/jobs';
+}
+
 function loadJobs() {
-    fetch('/api/jobs')
-        .then(response => response.json())
+    loadFederationControllers()
+        // Search, paging and folders go to the primary controller; the merged list is every top level
+        .then(() => fetchJson(federation.enabled && !jobsQuery ? '/api/federation/jobs' : jobsUrl()))
         .then(data => {
             if (data.success) {
-                displayJobsInColumns(data.jobs);
+                displayJobsInColumns(data.jobs, data.next_cursor || null, false, data.controllers);
             } else {
                 showError('Failed to load jobs: ' + data.error);
             }
@@ -324,30 +622,43 @@ function loadJobs() {
         });
 }
 
-function displayJobsInColumns(jobs) {
-    const container = document.getElementById('jobs-list');
-    if (!container) return;
+// Called by the virtual list when the user scrolls near the end of the loaded rows
+function loadMoreJobs() {
+    if (!jobsNextCursor || jobsLoadingMore) return;
+    jobsLoadingMore = true;
     
-    if (jobs.length === 0) {
-        container.innerHTML = '<p>No jobs found. <a href="#" onclick="showCreateJobModal()">Create your first job</a></p>';
-        return;
-    }
+    fetchJson(jobsUrl(jobsNextCursor))
+        .then(data => {
+            if (data.success) {
+                displayJobsInColumns(data.jobs, data.next_cursor, true);
+            } else {
+                showError('Failed to load jobs: ' + data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading jobs:', error);
+            showError('Failed to load jobs');
+        })
+        .finally(() => {
+            jobsLoadingMore = false;
+        });
+}
 
-    const jobsHtml = jobs.map(job => {
-        const buildStatus = getBuildStatus(job);
-        const jobType = job.job_type || 'unknown';
-        const jobTypeIcon = getJobTypeIcon(jobType);
-        
-        const nonBuildableTypes = ['folder', 'organization'];
-        const isBuildable = !nonBuildableTypes.includes(jobType);
-        
+function renderJobItem(job, depth = 0) {
+    const buildStatus = getBuildStatus(job);
+    const jobType = job.job_type || 'unknown';
+    const jobTypeIcon = getJobTypeIcon(jobType);
+    
+    if (isRemoteItem(job)) {
+        const jobUrl = `${federation.urls[job.controller]}/${job.name.split('/').map(part => 'job/' + encodeURIComponent(part)).join('/')}/`;
         return `
-            <div class="job-item" onclick="showJobPopup('${job.name}')">
+            <div class="job-item" style="margin-left: ${depth * 1.5}rem">
                 <div class="job-info">
                     <div class="job-title">
                         <span class="job-icon">${jobTypeIcon}</span>
-                        <span class="job-name">${job.name}</span>
+                        <span class="job-name">${job.short_name || job.name}</span>
                         ${getJobTypeBadge(jobType)}
+                        ${getControllerBadge(job)}
                     </div>
                     <div class="job-status">
                         <span class="status ${buildStatus.class}">${buildStatus.text}</span>
@@ -355,16 +666,129 @@ function displayJobsInColumns(jobs) {
                 </div>
                 <div class="job-description">${job.description || 'No description'}</div>
                 <div class="job-actions">
-                    ${isBuildable ? `<button onclick="event.stopPropagation(); triggerBuild('${job.name}')" class="btn btn-primary">🚀 Build</button>` : ''}
-                    <button onclick="event.stopPropagation(); showJobConfig('${job.name}')" class="btn btn-secondary">⚙️ Configure</button>
-                    <button onclick="event.stopPropagation(); showJobPopup('${job.name}')" class="btn btn-info">📋 View Details</button>
-                    <button onclick="event.stopPropagation(); deleteJob('${job.name}')" class="btn btn-danger">🗑️ Delete</button>
+                    <a href="${jobUrl}" target="_blank" rel="noopener" class="btn btn-info">🔗 Open in ${job.controller}</a>
                 </div>
             </div>
         `;
-    }).join('');
+    }
     
-    container.innerHTML = jobsHtml;
+    const nonBuildableTypes = ['folder', 'organization'];
+    const isBuildable = !nonBuildableTypes.includes(jobType);
+    
+    return `
+        <div class="job-item" style="margin-left: ${depth * 1.5}rem" onclick="showJobPopup('${job.name}')">
+            <div class="job-info">
+                <div class="job-title">
+                    <span class="job-icon">${jobTypeIcon}</span>
+                    <span class="job-name">${job.short_name || job.name}</span>
+                    ${getJobTypeBadge(jobType)}
+                    ${getControllerBadge(job)}
+                </div>
+                <div class="job-status">
+                    <span class="status ${buildStatus.class}">${buildStatus.text}</span>
+                </div>
+            </div>
+            <div class="job-description">${job.description || 'No description'}</div>
+            <div class="job-actions">
+                ${job.has_children ? `<button onclick="event.stopPropagation(); toggleJobFolder('${job.name}')" class="btn btn-secondary">${expandedFolders.has(job.name) ? '📁 Collapse' : '📂 Expand'}</button>` : ''}
+                ${isBuildable ? `<button onclick="event.stopPropagation(); triggerBuild('${job.name}')" class="btn btn-primary">🚀 Build</button>` : ''}
+                <button onclick="event.stopPropagation(); showJobConfig('${job.name}')" class="btn btn-secondary">⚙️ Configure</button>
+                <button onclick="event.stopPropagation(); showJobPopup('${job.name}')" class="btn btn-info">📋 View Details</button>
+                <button onclick="event.stopPropagation(); deleteJob('${job.name}')" class="btn btn-danger">🗑️ Delete</button>
+            </div>
+        </div>
+    `;
+}
+
+function renderJobRow(row) {
+    if (row.cursor) {
+        return `<div class="job-item job-row-note" style="margin-left: ${row.depth * 1.5}rem">
+            <button onclick="toggleJobFolder('${row.folder}', '${row.cursor}')" class="btn btn-secondary">⬇️ Load more in ${row.folder}</button>
+        </div>`;
+    }
+    if (row.message) {
+        return `<div class="job-item job-row-note" style="margin-left: ${row.depth * 1.5}rem">${row.message}</div>`;
+    }
+    return renderJobItem(row.job, row.depth);
+}
+
+function displayJobsInColumns(jobs, nextCursor = null, append = false, controllers = null) {
+    const container = document.getElementById('jobs-list');
+    if (!container) return;
+    
+    if (!append && jobs.length === 0) {
+        clearVirtualList(container);
+        container.innerHTML = getUnavailableControllers(controllers) + '<p>No jobs found. <a href="#" onclick="showCreateJobModal()">Create your first job</a></p>';
+        return;
+    }
+    
+    const rows = jobs.map(job => ({ job: job, depth: 0 }));
+    const unavailable = getUnavailableControllers(controllers);
+    if (unavailable) {
+        rows.unshift({ message: unavailable, depth: 0 });
+    }
+    if (append) {
+        jobRows = jobRows.concat(rows);
+    } else {
+        jobRows = rows;
+        expandedFolders.clear();
+    }
+    jobsNextCursor = nextCursor;
+    
+    virtualListFor(container, renderJobRow, { gap: 16, rowHeight: 190, onNearEnd: loadMoreJobs }).setItems(jobRows);
+}
+
+// Folders and multibranch projects load their children only when expanded
+function toggleJobFolder(folderName, cursor = null) {
+    const jobsVirtualList = document.getElementById('jobs-list').virtualList;
+    const folderIndex = jobRows.findIndex(row => row.job && row.job.name === folderName);
+    if (folderIndex === -1) return;
+    const depth = jobRows[folderIndex].depth;
+    
+    if (!cursor && expandedFolders.has(folderName)) {
+        // Collapse: drop every row below the folder that is nested deeper
+        let end = folderIndex + 1;
+        while (end < jobRows.length && jobRows[end].depth > depth) {
+            if (jobRows[end].job) expandedFolders.delete(jobRows[end].job.name);
+            end++;
+        }
+        expandedFolders.delete(folderName);
+        jobRows.splice(folderIndex + 1, end - folderIndex - 1);
+        jobRows[folderIndex] = Object.assign({}, jobRows[folderIndex]);
+        jobsVirtualList.setItems(jobRows);
+        return;
+    }
+    
+    fetchJson(`/api/jobs?folder=${encodeURIComponent(folderName)}&depth=1${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`)
+        .then(data => {
+            if (!data.success) {
+                showError('Failed to load folder: ' + data.error);
+                return;
+            }
+            
+            const children = data.jobs.map(job => ({ job: job, depth: depth + 1 }));
+            if (!cursor && children.length === 0) {
+                children.push({ message: 'Empty folder', depth: depth + 1 });
+            }
+            if (data.next_cursor) {
+                children.push({ folder: folderName, cursor: data.next_cursor, depth: depth + 1 });
+            }
+            
+            if (cursor) {
+                // Replace the "load more" row of this folder with the next page
+                const moreIndex = jobRows.findIndex(row => row.folder === folderName && row.cursor === cursor);
+                if (moreIndex !== -1) jobRows.splice(moreIndex, 1, ...children);
+            } else {
+                expandedFolders.add(folderName);
+                jobRows[folderIndex] = Object.assign({}, jobRows[folderIndex]);
+                jobRows.splice(folderIndex + 1, 0, ...children);
+            }
+            jobsVirtualList.setItems(jobRows);
+        })
+        .catch(error => {
+            console.error('Error loading folder:', error);
+            showError('Failed to load folder');
+        });
 }
 
 // NEW: Enhanced Job Configuration Functions - NOW AS POPUP MODAL
@@ -381,8 +805,7 @@ function showJobConfig(jobName) {
         setupConfigModalButtons(jobName);
     }
     
-    fetch(`/api/job/${encodeURIComponent(jobName)}/config`)
-        .then(response => response.json())
+    fetchJson(`/api/job/${encodeURIComponent(jobName)}/config`)
         .then(data => {
             if (data.success) {
                 currentJobType = data.job_type;
@@ -479,7 +902,7 @@ function displayJobConfigModal(jobName, jobType, config) {
                                         <select id="config-credentials" name="credentials_id" class="form-control">
                                             <option value="">- none -</option>
                                         </select>
-                                        <button type="button" class="btn btn-sm btn-secondary" onclick="loadCredentials()" title="Refresh credentials list">
+                                        <button type="button" class="btn btn-sm btn-secondary" onclick="invalidateApiCache('/api/credentials'); loadCredentials()" title="Refresh credentials list">
                                             🔄
                                         </button>
                                         <button type="button" class="btn btn-sm btn-info" onclick="addCredential()" title="Add new credential">
@@ -856,8 +1279,7 @@ function displayJobConfigModal(jobName, jobType, config) {
 
 // NEW: Load credentials function (Enhanced)
 function loadCredentials() {
-    fetch('/api/credentials')
-        .then(response => response.json())
+    fetchJson('/api/credentials')
         .then(data => {
             if (data.success) {
                 const credentialsSelects = document.querySelectorAll('select[name="credentials_id"]');
@@ -1072,7 +1494,7 @@ function saveJobConfig(jobName, jobType, shouldClose = true) {
         console.log('Sending configuration data:', configData);
         
         // Save configuration with proper error handling
-        fetch(`/api/job/${encodeURIComponent(jobName)}/config/update`, {
+        apiFetch(`/api/job/${encodeURIComponent(jobName)}/config/update`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -1562,7 +1984,7 @@ function createJob(jobData) {
     submitBtn.textContent = 'Creating...';
     submitBtn.disabled = true;
     
-    fetch('/api/jobs/create', {
+    apiFetch('/api/jobs/create', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -1601,7 +2023,7 @@ function createJob(jobData) {
 
 // Trigger Build Function
 function triggerBuild(jobName) {
-    fetch(`/api/job/${encodeURIComponent(jobName)}/build`, {
+    apiFetch(`/api/job/${encodeURIComponent(jobName)}/build`, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -1613,7 +2035,9 @@ function triggerBuild(jobName) {
     .then(data => {
         if (data.success) {
             showSuccess(`Build triggered for job: ${jobName}`);
-            if (currentJob === jobName) {
+            if (data.queue_id) {
+                waitForBuildStart(jobName, data.queue_id);
+            } else if (currentJob === jobName) {
                 setTimeout(() => {
                     loadJobBuildsForPopup(jobName);
                 }, 2000);
@@ -1632,13 +2056,78 @@ function triggerBuild(jobName) {
     });
 }
 
+// Long-poll the queue item until it becomes a build, then open its console if the job popup is still open
+function waitForBuildStart(jobName, queueId, attempt = 0) {
+    if (attempt >= 10) return;
+    
+    fetchJson(`/api/queue/${queueId}/wait?timeout=25`)
+        .then(data => {
+            if (!data.success) {
+                console.error('Failed to wait for queue item:', data.error);
+            } else if (data.status === 'started') {
+                showSuccess(`${jobName} #${data.build_number} started`);
+                if (currentJob === jobName) {
+                    loadJobBuildsForPopup(jobName);
+                    showConsoleOutput(data.build_number);
+                }
+            } else if (data.status === 'cancelled') {
+                showError(`Queued build for ${jobName} was cancelled`);
+            } else {
+                waitForBuildStart(jobName, queueId, attempt + 1);
+            }
+        })
+        .catch(error => {
+            console.error('Error waiting for queue item:', error);
+        });
+}
+
+// Trigger one build per combination of parameter values
+function triggerMatrixBuild(jobName) {
+    const matrixText = prompt('Parameter matrix as JSON, e.g. {"PYTHON": ["3.10", "3.11"], "OS": ["linux", "windows"]}:');
+    if (!matrixText) return;
+    
+    let matrix;
+    try {
+        matrix = JSON.parse(matrixText);
+    } catch (e) {
+        showError('Invalid matrix JSON: ' + e.message);
+        return;
+    }
+    
+    apiFetch('/api/jobs/build-batch', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        },
+        body: JSON.stringify({ job: jobName, matrix: matrix })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showSuccess(`Queued ${data.queued} builds for ${jobName}${data.failed ? ` (${data.failed} failed)` : ''}`);
+            if (currentJob === jobName) {
+                setTimeout(() => {
+                    loadJobBuildsForPopup(jobName);
+                }, 2000);
+            }
+        } else {
+            showError('Failed to trigger matrix build: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error triggering matrix build:', error);
+        showError('Failed to trigger matrix build: ' + error.message);
+    });
+}
+
 // Delete Job Function
 function deleteJob(jobName) {
     if (!confirm(`Are you sure you want to delete job "${jobName}"? This action cannot be undone.`)) {
         return;
     }
     
-    fetch(`/api/jobs/${encodeURIComponent(jobName)}/delete`, {
+    apiFetch(`/api/jobs/${encodeURIComponent(jobName)}/delete`, {
         method: 'DELETE',
         headers: {
             'Content-Type': 'application/json',
@@ -1692,8 +2181,7 @@ function loadJobDetailsForPopup(jobName) {
     
     container.innerHTML = '<div class="loading">Loading job details...</div>';
     
-    fetch(`/api/job/${encodeURIComponent(jobName)}`)
-        .then(response => response.json())
+    fetchJson(`/api/job/${encodeURIComponent(jobName)}`)
         .then(data => {
             if (data.success) {
                 displayJobDetailsInPopup(data.job_info);
@@ -1715,6 +2203,8 @@ function displayJobDetailsInPopup(jobInfo) {
     
     const jobType = jobInfo.job_type || 'unknown';
     const jobTypeIcon = getJobTypeIcon(jobType);
+    // Actions need the full path; jobInfo.name is only the leaf for jobs inside folders
+    const jobPath = jobInfo.fullName || currentJob || jobInfo.name;
     
     container.innerHTML = `
         <div class="job-detail-card">
@@ -1740,26 +2230,101 @@ function displayJobDetailsInPopup(jobInfo) {
             </div>
             <div class="job-actions">
                 ${jobInfo.buildable && !['folder', 'organization'].includes(jobType) ? 
-                    `<button onclick="triggerBuild('${jobInfo.name}')" class="btn btn-primary">🚀 Build Now</button>` : 
+                    `<button onclick="triggerBuild('${jobPath}')" class="btn btn-primary">🚀 Build Now</button>` : 
                     `<span class="btn btn-secondary disabled">Not Buildable</span>`
                 }
-                <button onclick="showJobConfig('${jobInfo.name}')" class="btn btn-secondary">⚙️ Configure</button>
+                ${jobInfo.buildable && !['folder', 'organization'].includes(jobType) ? 
+                    `<button onclick="triggerMatrixBuild('${jobPath}')" class="btn btn-secondary">🧮 Matrix Build</button>` : ''
+                }
+                <button onclick="showJobConfig('${jobPath}')" class="btn btn-secondary">⚙️ Configure</button>
+                ${jobType === 'pipeline' ? `<button onclick="loadStageTimingsForPopup('${jobPath}')" class="btn btn-info">📊 Stage Timings</button>` : ''}
             </div>
         </div>
     `;
 }
 
+function loadStageTimingsForPopup(jobName) {
+    const container = document.getElementById('popup-build-details');
+    if (!container) return;
+    
+    container.innerHTML = '<div class="loading">Loading stage timings...</div>';
+    
+    fetchJson(`/api/job/${encodeURIComponent(jobName)}/stages?builds=10`)
+        .then(data => {
+            if (data.success) {
+                displayStageTimingsInPopup(data.stage_timings);
+            } else {
+                showError('Failed to load stage timings: ' + data.error);
+                container.innerHTML = '<p class="error">Failed to load stage timings</p>';
+            }
+        })
+        .catch(error => {
+            console.error('Error loading stage timings:', error);
+            showError('Failed to load stage timings');
+            container.innerHTML = '<p class="error">Failed to load stage timings</p>';
+        });
+}
+
+function displayStageTimingsInPopup(timings) {
+    const container = document.getElementById('popup-build-details');
+    if (!container) return;
+    
+    const maxP95 = Math.max(1, ...timings.stages.map(name => timings.summary[name].p95 || 0));
+    
+    const stageRows = timings.stages.map(name => {
+        const stats = timings.summary[name];
+        const p50Width = Math.round((stats.p50 || 0) / maxP95 * 100);
+        const p95Width = Math.round((stats.p95 || 0) / maxP95 * 100);
+        const change = stats.change !== null ? `${stats.change > 0 ? '+' : ''}${Math.round(stats.change * 100)}%` : 'n/a';
+        
+        return `
+            <div class="stage-timing-row ${stats.regressed ? 'regressed' : ''}">
+                <div class="stage-timing-label">
+                    <span>${stats.regressed ? '🔺 ' : ''}${name}</span>
+                    <span class="stage-timing-values">p50 ${formatDuration(stats.p50)} · p95 ${formatDuration(stats.p95)} · ${change}</span>
+                </div>
+                <div class="stage-timing-bar">
+                    <div class="stage-timing-p95" style="width: ${p95Width}%"></div>
+                    <div class="stage-timing-p50" style="width: ${p50Width}%"></div>
+                </div>
+            </div>
+        `;
+    }).join('');
+    
+    const regressedCount = timings.stages.filter(name => timings.summary[name].regressed).length;
+    
+    container.innerHTML = `
+        <div class="build-detail-card">
+            <div class="build-detail-header">
+                <h3>📊 Stage Timings (last ${timings.builds.length} builds)</h3>
+                <span class="status ${regressedCount > 0 ? 'status-failure' : 'status-success'}">
+                    ${regressedCount > 0 ? `${regressedCount} regressed` : 'No regressions'}
+                </span>
+            </div>
+            <div class="build-detail-content">
+                ${stageRows}
+                <p><small>Builds #${timings.builds[0]} – #${timings.builds[timings.builds.length - 1]}. 
+                Regression = recent p50 more than ${Math.round(timings.regression_threshold * 100)}% above baseline p50.</small></p>
+            </div>
+        </div>
+    `;
+}
+
+let popupBuilds = [];
+let popupBuildsNextCursor = null;
+let popupBuildsLoadingMore = false;
+let popupBuildsVirtualList = null;
+
 function loadJobBuildsForPopup(jobName) {
     const container = document.getElementById('popup-job-builds');
     if (!container) return;
     
     container.innerHTML = '<div class="loading">Loading builds...</div>';
     
-    fetch(`/api/job/${encodeURIComponent(jobName)}/builds`)
-        .then(response => response.json())
+    fetchJson(`/api/job/${encodeURIComponent(jobName)}/builds`)
         .then(data => {
             if (data.success) {
-                displayJobBuildsInPopup(data.builds);
+                displayJobBuildsInPopup(data.builds, data.next_cursor);
             } else {
                 showError('Failed to load builds: ' + data.error);
                 container.innerHTML = '<p class="error">Failed to load builds</p>';
@@ -1772,7 +2337,60 @@ function loadJobBuildsForPopup(jobName) {
         });
 }
 
-function displayJobBuildsInPopup(builds) {
+// Older builds are fetched page by page as the build list is scrolled
+function loadMoreBuildsForPopup() {
+    if (!currentJob || !popupBuildsNextCursor || popupBuildsLoadingMore) return;
+    popupBuildsLoadingMore = true;
+    
+    fetchJson(`/api/job/${encodeURIComponent(currentJob)}/builds?before=${encodeURIComponent(popupBuildsNextCursor)}`)
+        .then(data => {
+            if (data.success) {
+                popupBuilds = popupBuilds.concat(data.builds);
+                popupBuildsNextCursor = data.next_cursor;
+                popupBuildsVirtualList.setItems(popupBuilds);
+            } else {
+                showError('Failed to load builds: ' + data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading builds:', error);
+            showError('Failed to load builds');
+        })
+        .finally(() => {
+            popupBuildsLoadingMore = false;
+        });
+}
+
+function renderBuildItem(build) {
+    const buildStatus = getBuildStatus(build);
+    let date = 'Unknown date';
+    
+    if (build.timestamp) {
+        try {
+            date = new Date(build.timestamp).toLocaleString();
+        } catch (e) {
+            console.warn('Invalid timestamp:', build.timestamp);
+        }
+    }
+    
+    return `
+        <div class="build-item ${currentBuild === build.number ? 'selected' : ''}" onclick="selectBuildInPopup(${build.number})">
+            <div class="build-info">
+                <div class="build-number">#${build.number}</div>
+                <div class="build-status">
+                    <span class="status ${buildStatus.class}">${buildStatus.text}</span>
+                </div>
+                <div class="build-date">${date}</div>
+            </div>
+            <div class="build-actions">
+                <button onclick="event.stopPropagation(); showConsoleOutput(${build.number})" class="btn btn-sm btn-console">📋 Console</button>
+                <button onclick="event.stopPropagation(); loadBuildDetailsInPopup(${build.number})" class="btn btn-sm btn-details">ℹ️ Details</button>
+            </div>
+        </div>
+    `;
+}
+
+function displayJobBuildsInPopup(builds, nextCursor = null) {
     const container = document.getElementById('popup-job-builds');
     if (!container) return;
     
@@ -1781,43 +2399,22 @@ function displayJobBuildsInPopup(builds) {
         return;
     }
 
-    const buildsHtml = `
+    container.innerHTML = `
         <div class="builds-header">
-            <h3>📋 Builds for ${currentJob} (${builds.length} total)</h3>
-        </div>
-        <div class="builds-list">
-            ${builds.map(build => {
-                const buildStatus = getBuildStatus(build);
-                let date = 'Unknown date';
-                
-                if (build.timestamp) {
-                    try {
-                        date = new Date(build.timestamp).toLocaleString();
-                    } catch (e) {
-                        console.warn('Invalid timestamp:', build.timestamp);
-                    }
-                }
-                
-                return `
-                    <div class="build-item ${currentBuild === build.number ? 'selected' : ''}" onclick="selectBuildInPopup(${build.number})">
-                        <div class="build-info">
-                            <div class="build-number">#${build.number}</div>
-                            <div class="build-status">
-                                <span class="status ${buildStatus.class}">${buildStatus.text}</span>
-                            </div>
-                            <div class="build-date">${date}</div>
-                        </div>
-                        <div class="build-actions">
-                            <button onclick="event.stopPropagation(); showConsoleOutput(${build.number})" class="btn btn-sm btn-console">📋 Console</button>
-                            <button onclick="event.stopPropagation(); loadBuildDetailsInPopup(${build.number})" class="btn btn-sm btn-details">ℹ️ Details</button>
-                        </div>
-                    </div>
-                `;
-            }).join('')}
+            <h3>📋 Builds for ${currentJob}</h3>
         </div>
+        <div class="builds-list"></div>
     `;
     
-    container.innerHTML = buildsHtml;
+    popupBuilds = builds;
+    popupBuildsNextCursor = nextCursor;
+    if (popupBuildsVirtualList) popupBuildsVirtualList.destroy();
+    popupBuildsVirtualList = new VirtualList(container.querySelector('.builds-list'), renderBuildItem, {
+        gap: 8,
+        rowHeight: 110,
+        onNearEnd: loadMoreBuildsForPopup
+    });
+    popupBuildsVirtualList.setItems(popupBuilds);
 }
 
 function selectBuildInPopup(buildNumber) {
@@ -1843,8 +2440,7 @@ function loadBuildDetailsInPopup(buildNumber) {
     
     detailsContainer.innerHTML = '<div class="loading">Loading build details...</div>';
     
-    fetch(`/api/job/${encodeURIComponent(currentJob)}/build/${buildNumber}`)
-        .then(response => response.json())
+    fetchJson(`/api/job/${encodeURIComponent(currentJob)}/build/${buildNumber}`)
         .then(data => {
             if (data.success) {
                 displayBuildDetailsInPopup(data.build_info);
@@ -1909,8 +2505,7 @@ function showConsoleOutput(buildNumber) {
     
     consoleContainer.innerHTML = '<div class="loading">Loading console output...</div>';
     
-    fetch(`/api/job/${encodeURIComponent(currentJob)}/build/${buildNumber}/console`)
-        .then(response => response.json())
+    fetchJson(`/api/job/${encodeURIComponent(currentJob)}/build/${buildNumber}/console`)
         .then(data => {
             if (data.success) {
                 displayConsoleOutput(data.console_output, buildNumber);
@@ -2049,6 +2644,7 @@ function startAutoRefresh() {
         const dashboardSection = document.getElementById('dashboard-section');
         if (dashboardSection && dashboardSection.style.display !== 'none') {
             loadStatistics();
+            loadFederationOverview();
             loadRecentJobs();
         }
     }, 30000);
@@ -2061,18 +2657,13 @@ function stopAutoRefresh() {
     }
 }
 
+// Search runs on the server across all folders; wait for typing to pause
 function searchJobs(query) {
-    const jobItems = document.querySelectorAll('.job-item');
-    jobItems.forEach(item => {
-        const jobName = item.querySelector('.job-name').textContent.toLowerCase();
-        const jobDescription = item.querySelector('.job-description').textContent.toLowerCase();
-        
-        if (jobName.includes(query.toLowerCase()) || jobDescription.includes(query.toLowerCase())) {
-            item.style.display = 'block';
-        } else {
-            item.style.display = 'none';
-        }
-    });
+    clearTimeout(jobSearchTimer);
+    jobSearchTimer = setTimeout(() => {
+        jobsQuery = query.trim();
+        loadJobs();
+    }, 300);
 }
 
 // [Include all remaining functions from the original app.js]
@@ -2081,11 +2672,12 @@ function searchJobs(query) {
 
 // Load remaining sections (keeping all existing functions)
 function loadNodes() {
-    fetch('/api/nodes')
-        .then(response => response.json())
+    loadCapacityAdvice();
+    loadFederationControllers()
+        .then(() => fetchJson(federation.enabled ? '/api/federation/nodes' : '/api/nodes'))
         .then(data => {
             if (data.success) {
-                displayNodesWithActions(data.nodes);
+                displayNodesWithActions(data.nodes, data.controllers);
             } else {
                 showError('Failed to load nodes: ' + data.error);
             }
@@ -2096,12 +2688,57 @@ function loadNodes() {
         });
 }
 
-function displayNodesWithActions(nodes) {
+function loadCapacityAdvice() {
+    fetchJson('/api/capacity/advisor')
+        .then(data => {
+            if (data.success) {
+                displayCapacityAdvice(data.advice);
+            } else {
+                console.error('Failed to load capacity advice:', data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading capacity advice:', error);
+        });
+}
+
+function displayCapacityAdvice(advice) {
+    const container = document.getElementById('capacity-advisor');
+    if (!container) return;
+    
+    const pools = advice.pools.filter(pool => pool.queued > 0 || pool.bottleneck);
+    if (pools.length === 0) {
+        container.innerHTML = '';
+        return;
+    }
+    
+    container.innerHTML = `
+        <div class="job-detail-content">
+            <h3>🧭 Capacity Advisor (drain target ${advice.target_minutes} min)</h3>
+            <table class="detail-table">
+                <tr><td><strong>Label</strong></td><td><strong>Queued</strong></td><td><strong>Executors</strong></td><td><strong>Drain</strong></td><td><strong>Recommended</strong></td><td><strong>Why</strong></td></tr>
+                ${pools.map(pool => `
+                    <tr>
+                        <td>${pool.bottleneck ? '🔺 ' : ''}${pool.label}</td>
+                        <td>${pool.queued}</td>
+                        <td>${pool.busy_executors}/${pool.online_executors}</td>
+                        <td>${pool.estimated_drain_minutes !== null ? pool.estimated_drain_minutes + ' min' : 'never'}</td>
+                        <td>${pool.recommended_executors}${pool.additional_executors ? ` (+${pool.additional_executors})` : ''}</td>
+                        <td>${pool.reasons.join('; ') || '-'}</td>
+                    </tr>
+                `).join('')}
+            </table>
+        </div>
+    `;
+}
+
+function displayNodesWithActions(nodes, controllers = null) {
     const container = document.getElementById('nodes-list');
     if (!container) return;
     
+    const unavailable = getUnavailableControllers(controllers);
     if (nodes.length === 0) {
-        container.innerHTML = '<p>No nodes found</p>';
+        container.innerHTML = unavailable + '<p>No nodes found</p>';
         return;
     }
 
@@ -2119,6 +2756,7 @@ function displayNodesWithActions(nodes) {
                     <div class="node-title">
                         <span class="node-icon">🖥️</span>
                         <span class="node-name">${node.displayName || node.name}</span>
+                        ${getControllerBadge(node)}
                     </div>
                     <div class="node-status">
                         <span class="status ${statusClass}">${statusText}</span>
@@ -2130,19 +2768,19 @@ function displayNodesWithActions(nodes) {
                     ${node.offlineCause ? `<p><strong>Offline Reason:</strong> ${node.offlineCause}</p>` : ''}
                     ${node.monitorData ? `<p><strong>Architecture:</strong> ${node.monitorData['hudson.node_monitors.ArchitectureMonitor'] || 'Unknown'}</p>` : ''}
                 </div>
-                <div class="node-actions">
+                ${isRemoteItem(node) ? '' : `<div class="node-actions">
                     <button onclick="toggleNode('${node.name}')" class="btn btn-primary">${toggleIcon} ${toggleText}</button>
                     ${!isMaster ? `<button onclick="deleteNode('${node.name}')" class="btn btn-danger">🗑️ Delete Node</button>` : ''}
-                </div>
+                </div>`}
             </div>
         `;
     }).join('');
     
-    container.innerHTML = nodesHtml;
+    container.innerHTML = unavailable + nodesHtml;
 }
 
 function toggleNode(nodeName) {
-    fetch(`/api/nodes/${encodeURIComponent(nodeName)}/toggle`, {
+    apiFetch(`/api/nodes/${encodeURIComponent(nodeName)}/toggle`, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -2170,7 +2808,7 @@ function deleteNode(nodeName) {
         return;
     }
     
-    fetch(`/api/nodes/${encodeURIComponent(nodeName)}/delete`, {
+    apiFetch(`/api/nodes/${encodeURIComponent(nodeName)}/delete`, {
         method: 'DELETE',
         headers: {
             'Content-Type': 'application/json',
@@ -2194,11 +2832,12 @@ function deleteNode(nodeName) {
 }
 
 function loadQueue() {
-    fetch('/api/queue')
-        .then(response => response.json())
+    loadQueueAnalytics();
+    loadFederationControllers()
+        .then(() => fetchJson(federation.enabled ? '/api/federation/queue' : '/api/queue'))
         .then(data => {
             if (data.success) {
-                displayQueueWithActions(data.queue);
+                displayQueueWithActions(data.queue, data.controllers);
             } else {
                 showError('Failed to load queue: ' + data.error);
             }
@@ -2209,12 +2848,13 @@ function loadQueue() {
         });
 }
 
-function displayQueueWithActions(queue) {
+function displayQueueWithActions(queue, controllers = null) {
     const container = document.getElementById('queue-list');
     if (!container) return;
     
+    const unavailable = getUnavailableControllers(controllers);
     if (queue.length === 0) {
-        container.innerHTML = '<p>Queue is empty</p>';
+        container.innerHTML = unavailable + '<p>Queue is empty</p>';
         return;
     }
 
@@ -2230,6 +2870,7 @@ function displayQueueWithActions(queue) {
                     <div class="queue-title">
                         <span class="queue-icon">⏳</span>
                         <span class="queue-job-name">${taskName}</span>
+                        ${getControllerBadge(item)}
                     </div>
                     <div class="queue-status">
                         <span class="status ${statusClass}">${statusText}</span>
@@ -2241,14 +2882,56 @@ function displayQueueWithActions(queue) {
                     <p><strong>Buildable:</strong> ${item.buildable ? 'Yes' : 'No'}</p>
                     ${item.params ? `<p><strong>Parameters:</strong> ${item.params}</p>` : ''}
                 </div>
-                <div class="queue-actions">
+                ${isRemoteItem(item) ? '' : `<div class="queue-actions">
                     <button onclick="cancelQueueItem(${item.id})" class="btn btn-danger">❌ Cancel</button>
-                </div>
+                </div>`}
             </div>
         `;
     }).join('');
     
-    container.innerHTML = queueHtml;
+    container.innerHTML = unavailable + queueHtml;
+}
+
+function loadQueueAnalytics() {
+    fetchJson('/api/queue/analytics')
+        .then(data => {
+            if (data.success) {
+                displayQueueAnalytics(data.analytics);
+            } else {
+                console.error('Failed to load queue analytics:', data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading queue analytics:', error);
+        });
+}
+
+function displayQueueAnalytics(analytics) {
+    const container = document.getElementById('queue-analytics');
+    if (!container) return;
+    
+    const labels = Object.entries(analytics.by_label);
+    if (labels.length === 0 && analytics.alerts.length === 0) {
+        container.innerHTML = '';
+        return;
+    }
+    
+    const alertsHtml = analytics.alerts.map(item => `
+        <p class="error">⚠️ <strong>${item.job}</strong> ${item.stuck ? 'is stuck' : 'waiting'} for ${formatDuration(item.wait_ms)}: ${item.why}</p>
+    `).join('');
+    
+    container.innerHTML = `
+        <div class="job-detail-content">
+            <h3>📈 Queue Wait Times (last ${analytics.window_minutes} min)</h3>
+            ${alertsHtml}
+            <table class="detail-table">
+                <tr><td><strong>Label</strong></td><td><strong>Items</strong></td><td><strong>p50</strong></td><td><strong>p95</strong></td><td><strong>Max</strong></td></tr>
+                ${labels.map(([label, stats]) => `
+                    <tr><td>${label}</td><td>${stats.count}</td><td>${formatDuration(stats.p50)}</td><td>${formatDuration(stats.p95)}</td><td>${formatDuration(stats.max)}</td></tr>
+                `).join('')}
+            </table>
+        </div>
+    `;
 }
 
 function cancelQueueItem(queueId) {
@@ -2256,7 +2939,7 @@ function cancelQueueItem(queueId) {
         return;
     }
     
-    fetch(`/api/queue/${queueId}/cancel`, {
+    apiFetch(`/api/queue/${queueId}/cancel`, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -2281,8 +2964,7 @@ function cancelQueueItem(queueId) {
 }
 
 function loadPlugins() {
-    fetch('/api/plugins')
-        .then(response => response.json())
+    fetchJson('/api/plugins')
         .then(data => {
             if (data.success) {
                 displayPlugins(data.plugins);
@@ -2296,46 +2978,46 @@ function loadPlugins() {
         });
 }
 
+function renderPluginItem(plugin) {
+    const statusClass = plugin.enabled ? 'status-success' : 'status-disabled';
+    const statusText = plugin.enabled ? 'Enabled' : 'Disabled';
+    
+    return `
+        <div class="plugin-item">
+            <div class="plugin-header">
+                <div class="plugin-title">
+                    <span class="job-icon">🔌</span>
+                    <span class="plugin-name">${plugin.shortName}</span>
+                </div>
+                <div class="plugin-status">
+                    <span class="status ${statusClass}">${statusText}</span>
+                </div>
+            </div>
+            <div class="plugin-details">
+                <p><strong>Version:</strong> ${plugin.version}</p>
+                <p><strong>Long Name:</strong> ${plugin.longName || 'N/A'}</p>
+                <p><strong>Status:</strong> ${statusText}</p>
+                <p><strong>Has Update:</strong> ${plugin.hasUpdate ? 'Yes' : 'No'}</p>
+            </div>
+        </div>
+    `;
+}
+
 function displayPlugins(plugins) {
     const container = document.getElementById('plugins-list');
     if (!container) return;
     
     if (plugins.length === 0) {
+        clearVirtualList(container);
         container.innerHTML = '<p>No plugins found</p>';
         return;
     }
 
-    const pluginsHtml = plugins.map(plugin => {
-        const statusClass = plugin.enabled ? 'status-success' : 'status-disabled';
-        const statusText = plugin.enabled ? 'Enabled' : 'Disabled';
-        
-        return `
-            <div class="plugin-item">
-                <div class="plugin-header">
-                    <div class="plugin-title">
-                        <span class="job-icon">🔌</span>
-                        <span class="plugin-name">${plugin.shortName}</span>
-                    </div>
-                    <div class="plugin-status">
-                        <span class="status ${statusClass}">${statusText}</span>
-                    </div>
-                </div>
-                <div class="plugin-details">
-                    <p><strong>Version:</strong> ${plugin.version}</p>
-                    <p><strong>Long Name:</strong> ${plugin.longName || 'N/A'}</p>
-                    <p><strong>Status:</strong> ${statusText}</p>
-                    <p><strong>Has Update:</strong> ${plugin.hasUpdate ? 'Yes' : 'No'}</p>
-                </div>
-            </div>
-        `;
-    }).join('');
-    
-    container.innerHTML = pluginsHtml;
+    virtualListFor(container, renderPluginItem, { gap: 16, rowHeight: 230 }).setItems(plugins);
 }
 
 function loadGitRepositories() {
-    fetch('/api/git/repositories')
-        .then(response => response.json())
+    fetchJson('/api/git/repositories')
         .then(data => {
             if (data.success) {
                 displayGitRepositories(data.repositories);
@@ -2448,7 +3130,7 @@ function handleAIAnalysis(e) {
     analyzeBtn.textContent = '🔍 Analyzing...';
     
     // Make API request
-    fetch('/api/ai/analyze-repository', {
+    apiFetch('/api/ai/analyze-repository', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -2682,7 +3364,7 @@ function handlePipelineCreation(e, analysisData) {
     };
     
     // Create pipeline job
-    fetch('/api/ai/create-pipeline-from-analysis', {
+    apiFetch('/api/ai/create-pipeline-from-analysis', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -2761,6 +3443,8 @@ function analyzeRepository() {
     const repositoryUrl = document.getElementById('repository-url').value.trim();
     const branch = document.getElementById('repository-branch').value.trim() || 'main';
     const envShellType = document.getElementById('env-shell-type').value || 'sh';  // GET ENVIRONMENT TYPE
+    const testShardsInput = document.getElementById('test-shards');
+    const testShards = testShardsInput ? parseInt(testShardsInput.value, 10) || 1 : 1;
 
     if (!repositoryUrl) {
         showError('Please enter a GitHub repository URL');
@@ -2785,10 +3469,11 @@ function analyzeRepository() {
     const requestData = {
         repository_url: repositoryUrl,
         branch: branch,
-        env_shell_type: envShellType  // SEND ENVIRONMENT TYPE TO BACKEND
+        env_shell_type: envShellType,  // SEND ENVIRONMENT TYPE TO BACKEND
+        test_shards: testShards
     };
 
-    fetch('/api/ai/analyze-repository', {
+    apiFetch('/api/ai/analyze-repository', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
@@ -2840,6 +3525,7 @@ function displayAnalysisResults(analysis, repositoryUrl, branch, envShellType) {
                 <p><strong>Repository:</strong> ${repositoryUrl}</p>
                 <p><strong>Branch:</strong> ${branch}</p>
                 <p><strong>Target Environment:</strong> ${envDisplay}</p>
+                <p><strong>Test Shards:</strong> ${analysisData.test_shards || 1}</p>
                 <p><strong>Generated:</strong> ${new Date().toLocaleString()}</p>
             </div>
         </div>
@@ -2923,7 +3609,11 @@ function displayAnalysisResults(analysis, repositoryUrl, branch, envShellType) {
                 <button class="btn btn-secondary" onclick="downloadJenkinsfile()">
                     💾 Download Jenkinsfile
                 </button>
+                <button class="btn btn-info" onclick="estimatePipelineCost()">
+                    ⏱️ Estimate Duration
+                </button>
             </div>
+            <div id="pipeline-estimate"></div>
         </div>
     `;
 
@@ -2961,7 +3651,7 @@ function createPipelineFromAnalysis(repositoryUrl, branch, envShellType) {
         env_shell_type: envShellType  // PASS ENVIRONMENT TYPE
     };
 
-    fetch('/api/ai/create-pipeline-from-analysis', {
+    apiFetch('/api/ai/create-pipeline-from-analysis', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
@@ -2984,6 +3674,66 @@ function createPipelineFromAnalysis(repositoryUrl, branch, envShellType) {
     });
 }
 
+function estimatePipelineCost() {
+    const analysisResults = window.currentAnalysisResults;
+    const container = document.getElementById('pipeline-estimate');
+    if (!analysisResults || !container) {
+        showError('No analysis results available');
+        return;
+    }
+
+    container.innerHTML = '<div class="loading">Estimating from similar jobs...</div>';
+
+    apiFetch('/api/ai/estimate-pipeline', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ jenkinsfile: analysisResults.jenkinsfile })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            displayPipelineEstimate(data.estimate);
+        } else {
+            showError('Failed to estimate pipeline: ' + data.error);
+            container.innerHTML = '';
+        }
+    })
+    .catch(error => {
+        console.error('Error estimating pipeline:', error);
+        showError('Failed to estimate pipeline');
+        container.innerHTML = '';
+    });
+}
+
+function displayPipelineEstimate(estimate) {
+    const container = document.getElementById('pipeline-estimate');
+    if (!container) return;
+
+    const stageRows = estimate.stages.map(stage => `
+        <tr>
+            <td>${stage.name}${stage.branches ? ` (${stage.branches.length} parallel)` : ''}</td>
+            <td>${formatDuration(stage.duration_ms)}</td>
+            <td>${stage.match}</td>
+        </tr>
+    `).join('');
+
+    container.innerHTML = `
+        <div class="analysis-explanation">
+            <h4>⏱️ Estimated Cost</h4>
+            <p><strong>Critical path:</strong> ${formatDuration(estimate.critical_path_ms)}
+               &nbsp; <strong>Executor-minutes:</strong> ${estimate.executor_minutes}
+               &nbsp; <strong>Reference jobs:</strong> ${estimate.reference_jobs}</p>
+            <table class="detail-table">
+                <tr><td><strong>Stage</strong></td><td><strong>Duration</strong></td><td><strong>Match</strong></td></tr>
+                ${stageRows}
+            </table>
+            ${estimate.unmatched_stages.length > 0 ? `<p><small>No history for: ${estimate.unmatched_stages.join(', ')}</small></p>` : ''}
+        </div>
+    `;
+}
+
 function getCurrentAnalysisResults() {
     // Get current analysis results from the global variable
     return window.currentAnalysisResults || null;